@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from typing import Dict
+
+class BulkheadFullError(Exception):
+    """Raised when a server's bulkhead has no free slot and its wait queue is full or timed out"""
+
+class Bulkhead:
+    """Caps concurrent calls to one MCP server, with a bounded queue of waiting callers"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Take a slot, waiting up to queue_timeout in the queue; raises BulkheadFullError"""
+        with self._condition:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                return
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise BulkheadFullError(f"Too many concurrent requests to MCP server {self.name}, try again shortly")
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise BulkheadFullError(f"Timed out waiting for MCP server {self.name}, try again shortly")
+                    self._condition.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """Free a slot and wake one waiting caller"""
+        with self._condition:
+            self.active = max(0, self.active - 1)
+            self._condition.notify()
+
+    def get_stats(self) -> Dict:
+        """Get current occupancy of the bulkhead"""
+        with self._condition:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'rejected': self.rejected,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue
+            }
+
+class BulkheadRegistry:
+    """Per-server bulkheads, sized from config.json with environment defaults"""
+
+    def __init__(self):
+        self.max_concurrent = int(os.getenv("MCP_BULKHEAD_MAX_CONCURRENT", 10))
+        self.max_queue = int(os.getenv("MCP_BULKHEAD_MAX_QUEUE", 20))
+        self.queue_timeout = float(os.getenv("MCP_BULKHEAD_QUEUE_TIMEOUT", 2))
+
+        self._limits = {}  # server url -> {"name", "maxConcurrent", "maxQueue"}
+        self._bulkheads = {}  # server url -> Bulkhead
+        self._lock = threading.Lock()
+
+    def configure(self, mcp_config: Dict):
+        """Read per-server maxConcurrent/maxQueue overrides from the mcpServers config"""
+        with self._lock:
+            for name, server in mcp_config.get("mcpServers", {}).items():
+                if server.get("url"):
+                    self._limits[server["url"]] = {**server, "name": name}
+
+    def get(self, url: str) -> Bulkhead:
+        """Return the bulkhead for a server URL"""
+        with self._lock:
+            bulkhead = self._bulkheads.get(url)
+            if bulkhead is None:
+                limits = self._limits.get(url, {})
+                bulkhead = Bulkhead(
+                    limits.get("name", url),
+                    int(limits.get("maxConcurrent", self.max_concurrent)),
+                    int(limits.get("maxQueue", self.max_queue)),
+                    float(limits.get("queueTimeout", self.queue_timeout))
+                )
+                self._bulkheads[url] = bulkhead
+            return bulkhead
+
+    def get_stats(self) -> Dict:
+        """Get occupancy of every server's bulkhead"""
+        with self._lock:
+            bulkheads = dict(self._bulkheads)
+        return {bulkhead.name: bulkhead.get_stats() for bulkhead in bulkheads.values()}
+
+# Global instance
+bulkheads = BulkheadRegistry()
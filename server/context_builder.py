@@ -0,0 +1,157 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from llm_client import llm_client
+from json_minimizer import JsonMinimizer
+
+class ContextBuilder:
+    """Builds the conversation history sent with a prompt, within a per-model token budget.
+
+    The newest messages that fit the budget are sent verbatim (each clipped to
+    max_message_tokens). Older messages are covered by a rolling summary stored on the
+    conversation; when messages age out of the window the summary is extended with just
+    those messages on a background worker, so a request never waits for it. Until a
+    stored summary covers them, aged-out messages are still sent verbatim, even over budget.
+    """
+
+    # History budgets in estimated tokens, matched by model name prefix (longest first)
+    MODEL_BUDGETS = {
+        "gemini-2.5": 16000,
+        "gemini": 8000,
+        "gpt-4": 8000,
+        "gpt-3.5": 3000,
+        "claude": 8000,
+        "llama3": 3000
+    }
+    DEFAULT_BUDGET = 4000
+
+    SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Update the current summary with the new messages. Keep facts, names, decisions, open requests and
+tool results the user may refer back to; drop pleasantries. Write plain prose, no markdown, at most {words} words."""
+
+    def __init__(self, max_message_tokens: int = None, summary_tokens: int = None, workers: int = None):
+        self.max_message_tokens = max_message_tokens or int(os.getenv("CONTEXT_MAX_MESSAGE_TOKENS", 1500))
+        self.summary_tokens = summary_tokens or int(os.getenv("CONTEXT_SUMMARY_TOKENS", 400))
+        self._executor = ThreadPoolExecutor(max_workers=workers or int(os.getenv("CONTEXT_SUMMARY_WORKERS", 2)),
+                                            thread_name_prefix="context-summary")
+        self._refreshing = set()  # conversation ids with a summary update queued or running
+        self._lock = threading.Lock()
+
+        self.summaries_updated = 0
+        self.summary_failures = 0
+
+    def budget_for(self, provider: str, model: Optional[str] = None) -> int:
+        """History token budget for a model; CONTEXT_TOKEN_BUDGET_<PROVIDER> overrides it"""
+        configured = os.getenv(f"CONTEXT_TOKEN_BUDGET_{provider.upper()}")
+        if configured:
+            return int(configured)
+        model = llm_client.model_for(provider, model)
+        for prefix in sorted(self.MODEL_BUDGETS, key=len, reverse=True):
+            if model.startswith(prefix):
+                return self.MODEL_BUDGETS[prefix]
+        return self.DEFAULT_BUDGET
+
+    def clip(self, content: str) -> str:
+        """Cut a message to max_message_tokens, keeping its start"""
+        max_chars = self.max_message_tokens * 4
+        if len(content) <= max_chars:
+            return content
+        return content[:max_chars] + f"... [truncated {len(content) - max_chars} characters]"
+
+    def build(self, conversation: Optional[Dict], prompt: Optional[str], provider: str = "gemini",
+              model: Optional[str] = None,
+              store_summary: Optional[Callable[[str, str, int], None]] = None) -> List[Dict]:
+        """Return history as {"role", "content"} dicts: the rolling summary, then recent messages.
+
+        store_summary(conversation_id, summary, message_count) persists an updated summary
+        covering the first message_count messages; without it the summary is never updated.
+        """
+        if not conversation:
+            return []
+        messages = [message for message in conversation.get("messages") or []
+                    if message.get("role") in ("user", "assistant") and isinstance(message.get("content"), str)]
+        # The current prompt is saved before the history is loaded; it is sent separately
+        if prompt and messages and messages[-1]["role"] == "user" and messages[-1]["content"] == prompt:
+            messages = messages[:-1]
+
+        summary = conversation.get("context_summary")
+        covered = conversation.get("summary_message_count") or 0
+        budget = self.budget_for(provider, model)
+        if summary:
+            budget -= JsonMinimizer.estimate_tokens(summary)
+
+        # Walk back from the newest message while the budget lasts
+        window = 0
+        used = 0
+        for message in reversed(messages):
+            tokens = JsonMinimizer.estimate_tokens(self.clip(message["content"]))
+            if window and used + tokens > budget:
+                break
+            window += 1
+            used += tokens
+
+        aged_out = len(messages) - window
+        if aged_out > covered and store_summary:
+            self._schedule_summary(conversation["id"], summary, messages[covered:aged_out], aged_out, store_summary)
+
+        # Messages the summary does not cover yet stay in, so nothing drops out unsummarized
+        recent = [{"role": message["role"], "content": self.clip(message["content"])}
+                  for message in messages[min(aged_out, covered):]]
+
+        history = []
+        if summary:
+            history.append({"role": "user", "content": f"Summary of our earlier conversation:\n{summary}"})
+            # Keep turns alternating when the recent window opens with a user message
+            if not recent or recent[0]["role"] == "user":
+                history.append({"role": "assistant", "content": "Understood, I'll keep that context in mind."})
+        return history + recent
+
+    def _schedule_summary(self, conversation_id: str, summary: Optional[str], new_messages: List[Dict],
+                          message_count: int, store_summary: Callable[[str, str, int], None]):
+        """Extend the conversation's summary with new_messages in the background, once at a time"""
+        with self._lock:
+            if conversation_id in self._refreshing:
+                return
+            self._refreshing.add(conversation_id)
+
+        def refresh():
+            try:
+                store_summary(conversation_id, self.summarize(summary, new_messages), message_count)
+                with self._lock:
+                    self.summaries_updated += 1
+            except Exception as e:
+                print(f"Failed to update context summary for conversation {conversation_id}: {e}")
+                with self._lock:
+                    self.summary_failures += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(conversation_id)
+
+        self._executor.submit(refresh)
+
+    def summarize(self, summary: Optional[str], new_messages: List[Dict]) -> str:
+        """Fold new_messages into summary with the LLM"""
+        transcript = "\n\n".join(f"{message['role'].capitalize()}: {self.clip(message['content'])}"
+                                 for message in new_messages)
+        return llm_client.chat(
+            "gemini",
+            self.SUMMARY_PROMPT.format(words=self.summary_tokens * 3 // 4),
+            f"Current summary:\n{summary or '(none yet)'}\n\nNew messages:\n{transcript}\n\nUpdated summary:",
+            temperature=0.2,
+            max_tokens=self.summary_tokens * 2,
+            thinking_budget=0
+        ).strip()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_message_tokens': self.max_message_tokens,
+                'summary_tokens': self.summary_tokens,
+                'refreshing': len(self._refreshing),
+                'summaries_updated': self.summaries_updated,
+                'summary_failures': self.summary_failures
+            }
+
+# Global instance
+context_builder = ContextBuilder()
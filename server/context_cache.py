@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from llm_client import llm_client, LLMError
+from json_minimizer import JsonMinimizer
+from response_cache import ResponseCache
+
+class GeminiCachedContents:
+    """Context cache backend on Gemini's cachedContents API"""
+
+    name = "gemini"
+
+    def create(self, contents: List[Dict], ttl: float, model: Optional[str] = None) -> tuple:
+        """Return (cache name, expiry timestamp)"""
+        created = llm_client.gemini_create_cache(contents, ttl, model)
+        return created["name"], self._expires_at(created, ttl)
+
+    def refresh(self, name: str, ttl: float) -> float:
+        return self._expires_at(llm_client.gemini_update_cache_ttl(name, ttl), ttl)
+
+    def delete(self, name: str):
+        llm_client.gemini_delete_cache(name)
+
+    def generate(self, name: str, contents: List[Dict], generation_config: Dict, model: Optional[str] = None) -> str:
+        return llm_client.gemini_generate(contents, generation_config, model=model, cachedContent=name)
+
+    def stream(self, name: str, contents: List[Dict], generation_config: Dict, model: Optional[str] = None,
+               on_response: Optional[Callable] = None) -> Iterator[str]:
+        return llm_client.gemini_stream(contents, generation_config, model=model, on_response=on_response,
+                                        cachedContent=name)
+
+    @staticmethod
+    def _expires_at(resource: Dict, ttl: float) -> float:
+        try:
+            return datetime.fromisoformat(resource["expireTime"].replace("Z", "+00:00")).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return time.time() + ttl
+
+class LocalCachedContents:
+    """Local stand-in for provider context caching, for keys or models without cachedContents.
+
+    Cached prefixes are kept in process and sent ahead of the request contents, so replies
+    match the uncached path; nothing is saved on the provider side.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.prefixes = {}  # cache name -> contents
+
+    def create(self, contents: List[Dict], ttl: float, model: Optional[str] = None) -> tuple:
+        name = f"cachedContents/local-{uuid.uuid4().hex}"
+        self.prefixes[name] = contents
+        return name, time.time() + ttl
+
+    def refresh(self, name: str, ttl: float) -> float:
+        if name not in self.prefixes:
+            raise LLMError(f"Cached content {name} not found", 404)
+        return time.time() + ttl
+
+    def delete(self, name: str):
+        self.prefixes.pop(name, None)
+
+    def _expand(self, name: str, contents: List[Dict]) -> List[Dict]:
+        if name not in self.prefixes:
+            raise LLMError(f"Cached content {name} not found", 404)
+        return self.prefixes[name] + contents
+
+    def generate(self, name: str, contents: List[Dict], generation_config: Dict, model: Optional[str] = None) -> str:
+        return llm_client.gemini_generate(self._expand(name, contents), generation_config, model=model)
+
+    def stream(self, name: str, contents: List[Dict], generation_config: Dict, model: Optional[str] = None,
+               on_response: Optional[Callable] = None) -> Iterator[str]:
+        return llm_client.gemini_stream(self._expand(name, contents), generation_config, model=model,
+                                        on_response=on_response)
+
+class ContextCache:
+    """Reuses a static prompt prefix (system prompt, tool catalog, priming turn) across requests.
+
+    The prefix is stored once with the provider and referenced by name, keyed by a digest
+    of the model and prefix contents. Entries are created on first use, have their TTL
+    extended once less than half of it remains, and are recreated after expiry. Prefixes
+    below min_tokens, backends that fail and failed cached requests all fall back to sending
+    the full prompt, so callers always get a reply; an entry is only dropped when the
+    provider reports its cache gone.
+    """
+
+    BACKENDS = {"gemini": GeminiCachedContents, "local": LocalCachedContents}
+
+    def __init__(self, backend: str = None, ttl: float = None, min_tokens: int = None,
+                 max_entries: int = 50, failure_backoff: float = 300):
+        backend = backend or os.getenv("GEMINI_CONTEXT_CACHE", "gemini")
+        self.backend = self.BACKENDS[backend]() if backend in self.BACKENDS else None
+        self.ttl = ttl or float(os.getenv("GEMINI_CONTEXT_CACHE_TTL", 3600))
+        # Gemini rejects cached contents smaller than its per-model minimum
+        self.min_tokens = min_tokens or int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", 1024))
+        self.max_entries = max_entries
+        self.failure_backoff = failure_backoff
+
+        self._entries = OrderedDict()  # key -> {"name", "expires_at"} or {"failed_until"}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.created = 0
+        self.refreshed = 0
+        self.fallbacks = 0
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def lookup(self, prefix: List[Dict], model: Optional[str] = None) -> Optional[str]:
+        """Return the cache name holding prefix, creating or refreshing it as needed; None to send it inline"""
+        if not self.backend:
+            return None
+        if JsonMinimizer.estimate_tokens(str(prefix)) < self.min_tokens:
+            return None
+
+        model = llm_client.model_for("gemini", model)
+        key = ResponseCache.make_key(self.backend.name, model, prefix)
+        # One caller creates or refreshes an entry; concurrent callers wait and reuse it
+        with self._key_lock(key):
+            now = time.time()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry:
+                    self._entries.move_to_end(key)
+            if entry and entry.get("failed_until", 0) > now:
+                return None
+
+            if entry and entry.get("name") and entry["expires_at"] > now:
+                if entry["expires_at"] - now < self.ttl / 2:
+                    try:
+                        entry["expires_at"] = self.backend.refresh(entry["name"], self.ttl)
+                        with self._lock:
+                            self.refreshed += 1
+                    except (LLMError, KeyError) as e:
+                        print(f"⚠️ Context cache refresh failed, recreating: {e}")
+                        entry = None
+                if entry:
+                    with self._lock:
+                        self.hits += 1
+                    return entry["name"]
+
+            try:
+                name, expires_at = self.backend.create(prefix, self.ttl, model)
+            except (LLMError, KeyError) as e:
+                print(f"⚠️ Context cache creation failed, sending prompts inline: {e}")
+                self._store(key, {"failed_until": now + self.failure_backoff})
+                return None
+            self._store(key, {"name": name, "expires_at": expires_at})
+            with self._lock:
+                self.created += 1
+            print(f"🗄️ Created context cache {name} ({self.backend.name})")
+            return name
+
+    def _store(self, key: str, entry: Dict):
+        """Record an entry, deleting the least recently used caches beyond max_entries"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old_key, old = self._entries.popitem(last=False)
+                self._key_locks.pop(old_key, None)
+                evicted.append(old)
+        for old in evicted:
+            if old.get("name"):
+                try:
+                    self.backend.delete(old["name"])
+                except LLMError as e:
+                    print(f"⚠️ Failed to delete context cache {old['name']}: {e}")
+
+    @staticmethod
+    def _cache_gone(error: LLMError) -> bool:
+        """Whether error means the cached content no longer exists (not found or expired)"""
+        message = str(error).lower()
+        return error.status == 404 or "not found" in message or "expired" in message
+
+    def _fall_back(self, name: str, error: LLMError):
+        """Drop and delete an entry whose cache is gone; keep it through any other failure"""
+        with self._lock:
+            self.fallbacks += 1
+        if not self._cache_gone(error):
+            print(f"⚠️ Request on cached content {name} failed, retrying with the prompt inline: {error}")
+            return
+        print(f"⚠️ Cached content {name} is gone, sending prompt inline: {error}")
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry.get("name") == name]:
+                del self._entries[key]
+        try:
+            self.backend.delete(name)
+        except LLMError as e:
+            print(f"⚠️ Failed to delete context cache {name}: {e}")
+
+    def generate(self, prefix: List[Dict], contents: List[Dict], generation_config: Dict,
+                 model: Optional[str] = None) -> str:
+        """Generate a reply to prefix + contents, with prefix served from the cache when possible"""
+        name = self.lookup(prefix, model)
+        if name:
+            try:
+                return self.backend.generate(name, contents, generation_config, model)
+            except LLMError as e:
+                self._fall_back(name, e)
+        return llm_client.gemini_generate(prefix + contents, generation_config, model=model)
+
+    def stream(self, prefix: List[Dict], contents: List[Dict], generation_config: Dict,
+               model: Optional[str] = None, on_response: Optional[Callable] = None) -> Iterator[str]:
+        """Streaming variant of generate; falls back only if the cached request fails before any text"""
+        name = self.lookup(prefix, model)
+        if name:
+            try:
+                chunks = self.backend.stream(name, contents, generation_config, model, on_response)
+                first = next(chunks, None)
+            except LLMError as e:
+                self._fall_back(name, e)
+            else:
+                if first is not None:
+                    yield first
+                yield from chunks
+                return
+        yield from llm_client.gemini_stream(prefix + contents, generation_config, model=model, on_response=on_response)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'backend': self.backend.name if self.backend else None,
+                'ttl': self.ttl,
+                'min_tokens': self.min_tokens,
+                'entries': sum(1 for entry in self._entries.values() if entry.get("name")),
+                'hits': self.hits,
+                'created': self.created,
+                'refreshed': self.refreshed,
+                'fallbacks': self.fallbacks
+            }
+
+# Global instance
+context_cache = ContextCache()
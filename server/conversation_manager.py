@@ -57,9 +57,45 @@ class ConversationManager:
             'created_at': conversation['created_at'],
             'last_interacted': conversation['last_interacted'],
             'message_count': conversation['message_count'],
+            'context_summary': conversation.get('context_summary'),
+            'summary_message_count': conversation.get('summary_message_count', 0),
             'messages': messages
         }
     
+    def get_message_count(self, conversation_id: str) -> Optional[int]:
+        """Get a conversation's message count without loading its messages"""
+        Conversation = Query()
+        conversation = self.conversations_table.get(Conversation.id == conversation_id)
+        return conversation.get('message_count', 0) if conversation else None
+
+    def get_untitled_conversations(self, limit: int = None) -> List[Dict]:
+        """Get conversations still titled "New Chat" that have messages, most recent first,
+        each with the first user message as 'query'"""
+        Conversation = Query()
+        conversations = self.conversations_table.search(
+            (Conversation.title == "New Chat") & (Conversation.message_count > 0)
+        )
+        conversations.sort(key=lambda x: x.get('last_interacted', ''), reverse=True)
+        if limit:
+            conversations = conversations[:limit]
+        
+        # One pass over the messages finds every conversation's first user message
+        first_queries = {conversation['id']: None for conversation in conversations}
+        Message = Query()
+        for message in self.messages_table.search(Message.role == 'user'):
+            conversation_id = message.get('conversation_id')
+            if conversation_id not in first_queries:
+                continue
+            first = first_queries[conversation_id]
+            if first is None or message.get('timestamp', '') < first.get('timestamp', ''):
+                first_queries[conversation_id] = message
+        
+        return [
+            {'id': conversation_id, 'query': message['content']}
+            for conversation_id, message in first_queries.items()
+            if message and message.get('content')
+        ]
+
     def get_all_conversations(self) -> List[Dict]:
         """Get all conversations (without messages) sorted by last_interacted"""
         conversations = self.conversations_table.all()
@@ -105,21 +141,43 @@ class ConversationManager:
         
         return True
     
-    def update_conversation_title(self, conversation_id: str, title: str) -> bool:
-        """Update the title of a conversation"""
+    def update_conversation_title(self, conversation_id: str, title: str, touch: bool = True) -> bool:
+        """Update the title of a conversation; touch=False keeps its last_interacted time"""
         Conversation = Query()
         conversation = self.conversations_table.search(Conversation.id == conversation_id)
         
         if not conversation:
             return False
         
-        self.conversations_table.update({
-            'title': title,
-            'last_interacted': datetime.now().isoformat()
-        }, Conversation.id == conversation_id)
+        updates = {'title': title}
+        if touch:
+            updates['last_interacted'] = datetime.now().isoformat()
+        self.conversations_table.update(updates, Conversation.id == conversation_id)
         
         return True
     
+    def update_context_summary(self, conversation_id: str, summary: str, message_count: int) -> bool:
+        """Store the rolling summary covering the conversation's first message_count messages"""
+        Conversation = Query()
+        updated = self.conversations_table.update({
+            'context_summary': summary,
+            'summary_message_count': message_count
+        }, Conversation.id == conversation_id)
+        return bool(updated)
+
+    def attach_summary(self, conversation_id: str, summary_handle: str, summary: Any) -> int:
+        """Store a deferred summary on the messages that reference its handle"""
+        Message = Query()
+
+        def set_summary(message):
+            message['metadata']['summary'] = summary
+
+        updated = self.messages_table.update(
+            set_summary,
+            (Message.conversation_id == conversation_id) & (Message.metadata.summaryHandle == summary_handle)
+        )
+        return len(updated)
+
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation and all its messages"""
         Conversation = Query()
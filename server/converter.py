@@ -1,166 +1,268 @@
-import json
-import os
-import requests
-from dotenv import load_dotenv
-from typing import Any
-
-# Load environment variables from a .env file
-load_dotenv()
-
-class JsonToNaturalLanguage:
-    """
-    A class to convert JSON data into clean, structured natural language summaries
-    focused on user-relevant information from various applications.
-    """
-    _PROMPT_TEMPLATE = """
-    Convert the following JSON data into a clear, structured natural language summary.
-    Focus on information that would be most relevant to an end user.
-
-    Guidelines:
-    1. Identify the application/service type (LinkedIn, Gmail, etc.) from the JSON structure
-    2. Extract only the most important information for the end user
-    3. Organize information in a logical, hierarchical structure
-    4. Use clear section headings without markdown formatting
-    5. Exclude technical details like IDs, server information unless absolutely necessary
-    6. For emails: focus on sender, subject, date, and key content
-    7. For social media posts: focus on content, visibility, and success status
-    8. For other apps: identify the key action and result
-    9. Keep the summary concise but informative
-
-    JSON Data:
-    {json_str}
-
-    Provide your response in this structured format:
-    [Application Type] Summary:
-    Status: [success/failure/other]
-    Key Action: [what was done]
-    Main Content: [primary information]
-    Additional Details: [other relevant info]
-    Result/Outcome: [what happened as a result]
-    """
-
-    def __init__(self):
-        """Initializes the converter and sets up the API client."""
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("API key not found. Please set the GEMINI_API_KEY environment variable.")
-        
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={self.api_key}"
-        self.session = requests.Session()
-        self.session.headers.update({"Content-Type": "application/json"})
-
-    def convert(self, json_data: Any) -> str:
-        """Converts JSON data into a clean, structured natural language summary."""
-        try:
-            if isinstance(json_data, str):
-                data = json.loads(json_data)
-            else:
-                data = json_data
-            
-            if not isinstance(data, (dict, list)):
-                return str(data)
-
-            prompt = self._create_prompt(data)
-            return self._call_gemini_api(prompt)
-        except Exception as e:
-            print(f"An unexpected error occurred during conversion: {e}")
-            return str(json_data)
-
-    def _create_prompt(self, data: dict | list) -> str:
-        """Builds the instruction prompt for the Gemini API."""
-        json_str = json.dumps(data, indent=2)
-        return self._PROMPT_TEMPLATE.format(json_str=json_str)
-
-    def _call_gemini_api(self, prompt: str) -> str:
-        """Sends the request to the Gemini API."""
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": 0.2,
-                "maxOutputTokens": 1024,
-                "topP": 0.8,
-                "topK": 40
-            },
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH", 
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                }
-            ]
-        }
-        
-        try:
-            response = self.session.post(self.api_url, json=payload, timeout=60)
-            response.raise_for_status()
-            api_response = response.json()
-            return self._parse_api_response(api_response)
-        except requests.exceptions.RequestException as e:
-            print(f"API call failed: {e}")
-            return "Error: Could not connect to the API."
-
-    def _parse_api_response(self, response_data: dict) -> str:
-        """Safely extracts the text content from the Gemini API response."""
-        try:
-            # Check for errors in response
-            if 'error' in response_data:
-                return f"API Error: {response_data['error']['message']}"
-            
-            # Extract text from successful response
-            text = response_data["candidates"][0]["content"]["parts"][0]["text"]
-            
-            # Clean up response by removing any markdown artifacts
-            cleaned_text = text.replace('###', '').replace('**', '').replace('*', '').strip()
-            
-            return cleaned_text
-        except (KeyError, IndexError, TypeError) as e:
-            print(f"Could not parse Gemini response: {e}")
-            return "Error: Failed to parse the API response."
-
-
-# Example usage
-if __name__ == "__main__":
-    converter = JsonToNaturalLanguage()
-    
-    # Example 1: LinkedIn post JSON
-    linkedin_json = {
-        "status": "SUCCESS",
-        "content": [
-            {
-                "type": "text",
-                "text": "{\"id\": \"21d7737d-95e3-4798-9272-2c3e95c99314\", \"actionId\": \"63508e62-bea0-41b6-8733-8e83c6aba234\", \"serverId\": \"583783e7-ed66-4f50-90c3-520536daf7bc\", \"instructions\": \"Post an update on LinkedIn about MCP servers.\", \"parameters\": {\"comment\": \"Exciting news for IT professionals! We're diving deep into the capabilities of MCP servers, exploring how they streamline operations, enhance security, and boost performance for modern infrastructures. What are your experiences or insights with MCP servers? Share below! #MCP #ServerManagement #ITInfrastructure #TechInnovation\", \"instructions\": \"Post an update on LinkedIn about MCP servers.\", \"visibility__code\": \"CONNECTIONS\"}, \"resolvedParameters\": {\"comment\": {\"value\": \"Exciting news for IT professionals! We're diving deep into the capabilities of MCP servers, exploring how they streamline operations, enhance security, and boost performance for modern infrastructures. What are your experiences or insights with MCP servers? Share below! #MCP #ServerManagement #ITInfrastructure #TechInnovation\", \"label\": \"Comment\", \"status\": \"locked\", \"reason\": \"top-level-hint\"}, \"visibility__code\": {\"value\": \"connections-only\", \"label\": \"Connections-only\", \"status\": \"guessed\", \"reason\": \"llm-guess\"}}, \"status\": \"SUCCESS\", \"created\": \"2025-09-17T07:31:54.730Z\", \"invocationId\": \"8dc21e29-4216-4e48-be0e-77b07ba504b0\", \"feedbackUrl\": \"https://mcp.zapier.com/api/mcp/s/NjMwZDhjNDQtZTRkYy00YzY3LWIyNGYtZDZhYmIxNThlMjlmOmIxODkzODYyLWY5ZWMtNGY1MC1hZGQ5LWVjYThlYjhiYzRjNA==/mcp\", \"result\": {\"url\": \"https://www.linkedin.com/feed/update/urn:li:share:7373982013701222400/\"}, \"isPreview\": false}"
-            }
-        ]
-    }
-    
-    # Example 2: Gmail emails JSON
-    gmail_json = {
-        "status": "SUCCESS",
-        "content": [
-            {
-                "type": "text",
-                "text": "{\"id\": \"6beeee3b-c942-45b7-99ce-7973744bb065\", \"actionId\": \"eef51b9e-1044-463c-98d4-bd68db3e4d07\", \"serverId\": \"583783e7-ed66-4f50-90c3-520536daf7bc\", \"instructions\": \"Find the most recent emails in the user's Gmail inbox.\", \"parameters\": {\"query\": \"in:inbox\"}, \"resolvedParameters\": {\"query\": {\"value\": \"in:inbox\", \"label\": \"Query\", \"status\": \"locked\", \"reason\": \"top-level-hint\"}}, \"status\": \"SUCCESS\", \"created\": \"2025-09-17T07:21:15.355Z\", \"invocationId\": \"9620a4fb-f083-4031-8c84-60d9d539e2b1\", \"isPreview\": false, \"feedbackUrl\": \"https://mcp.zapier.com/api/mcp/s/NjMwZDhjNDQtZTRkYy00YzY3LWIyNGYtZDZhYmIxNThlMjlmOmIxODkzODYyLWY5ZWMtNGY1MC1hZGQ5LWVjYThlYjhiYzRjNA==/mcp\", \"result\": [{\"id\": \"123\", \"message_id\": \"msg123\", \"thread_id\": \"thread123\", \"message_url\": \"https://mail.google.com/mail/u/0/#inbox/msg123\", \"to\": {\"names\": [], \"emails\": [\"imadabathuniharsha@gmail.com\"]}, \"cc\": {\"names\": [], \"emails\": []}, \"from\": {\"name\": \"\", \"email\": \"imadabathuniharsha@gmail.com\"}, \"reply_to\": {\"name\": \"\", \"email\": \"\"}, \"subject\": \"Regarding MCP\", \"body_plain\": \"Hello, I wanted to discuss the MCP implementation.\", \"date\": \"2025-09-16T10:30:00Z\", \"labels\": [\"UNREAD\", \"INBOX\"], \"attachment_count\": 0, \"all_attachments\": null}]}"
-            }
-        ]
-    }
-    
-    print("LinkedIn Conversion Result:")
-    result1 = converter.convert(linkedin_json)
-    print(result1)
-    
-    print("\n" + "="*50 + "\n")
-    
-    print("Gmail Conversion Result:")
-    result2 = converter.convert(gmail_json)
+import json
+import os
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+from llm_client import llm_client, LLMError
+from response_cache import ResponseCache
+from summarizers import summarizers
+from json_minimizer import json_minimizer
+
+# Load environment variables from a .env file
+load_dotenv()
+
+class JsonToNaturalLanguage:
+    """
+    A class to convert JSON data into clean, structured natural language summaries
+    focused on user-relevant information from various applications.
+    """
+    _GUIDELINES = """
+    Guidelines:
+    1. Identify the application/service type (LinkedIn, Gmail, etc.) from the JSON structure
+    2. Extract only the most important information for the end user
+    3. Organize information in a logical, hierarchical structure
+    4. Use clear section headings without markdown formatting
+    5. Exclude technical details like IDs, server information unless absolutely necessary
+    6. For emails: focus on sender, subject, date, and key content
+    7. For social media posts: focus on content, visibility, and success status
+    8. For other apps: identify the key action and result
+    9. Keep the summary concise but informative
+"""
+
+    _SUMMARY_FORMAT = """
+    [Application Type] Summary:
+    Status: [success/failure/other]
+    Key Action: [what was done]
+    Main Content: [primary information]
+    Additional Details: [other relevant info]
+    Result/Outcome: [what happened as a result]
+"""
+
+    _PROMPT_TEMPLATE = """
+    Convert the following JSON data into a clear, structured natural language summary.
+    Focus on information that would be most relevant to an end user.
+""" + _GUIDELINES + """
+    JSON Data:
+    {json_str}
+
+    Provide your response in this structured format:""" + _SUMMARY_FORMAT
+
+    _BATCH_PROMPT_TEMPLATE = """
+    Convert each of the following {count} JSON tool results into its own clear, structured
+    natural language summary. Focus on information that would be most relevant to an end user.
+""" + _GUIDELINES + """
+    Write every summary in this structured format, with a line break between sections:""" + _SUMMARY_FORMAT + """
+    Tool Results:
+    {results}
+
+    Respond with JSON only, one entry per result, using the result numbers as indexes:
+    {{"summaries": [{{"index": 0, "summary": "..."}}, {{"index": 1, "summary": "..."}}]}}
+    """
+
+    def __init__(self):
+        """Initializes the converter on the shared LLM client."""
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise ValueError("API key not found. Please set the GEMINI_API_KEY environment variable.")
+        
+        self.llm = llm_client
+        self.summarizers = summarizers
+        self.minimizer = json_minimizer
+        
+        # Summaries of identical tool outputs are reused instead of regenerated
+        self.cache = ResponseCache(
+            "conversions",
+            max_entries=int(os.getenv("CONVERTER_CACHE_MAX_ENTRIES", 2000)),
+            max_bytes=int(os.getenv("CONVERTER_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+            ttl=float(os.getenv("CONVERTER_CACHE_TTL", 86400)),
+            disk_path=os.getenv("CONVERTER_CACHE_PATH") or None
+        )
+
+    def convert(self, json_data: Any) -> str:
+        """Converts JSON data into a clean, structured natural language summary."""
+        try:
+            if isinstance(json_data, str):
+                data = json.loads(json_data)
+            else:
+                data = json_data
+            
+            if not isinstance(data, (dict, list)):
+                return str(data)
+
+            # Known result shapes are summarized locally; only unknown ones reach Gemini
+            summary = self.summarizers.summarize(data)
+            if summary is not None:
+                return summary
+
+            summary, _ = self.cache.get_or_set(
+                self._cache_key(data),
+                lambda: self._call_gemini_api(self._create_prompt(data))
+            )
+            return summary
+        except LLMError as e:
+            # Failed calls are not cached, so the next identical output tries again
+            print(f"API call failed: {e}")
+            # The provider's error text is logged, never shown to the user
+            return "Error: Could not connect to the API."
+        except Exception as e:
+            print(f"An unexpected error occurred during conversion: {e}")
+            return str(json_data)
+
+    def convert_local(self, data: dict | list) -> Optional[str]:
+        """Returns a summary without calling Gemini (local summarizer or cache hit), or None."""
+        summary = self.summarizers.summarize(data)
+        if summary is None:
+            summary = self.cache.get(self._cache_key(data))
+        return summary
+
+    def convert_batch(self, items: List[Any]) -> List[str]:
+        """Converts several JSON values, summarizing every unknown shape in a single Gemini request.
+
+        Items are answered by local summarizers or the cache where possible. If the batch
+        response cannot be parsed, or leaves an item out, that item is converted on its own.
+        """
+        summaries: List[Optional[str]] = [None] * len(items)
+        pending = []  # (index in items, data) still needing the LLM
+
+        for index, item in enumerate(items):
+            try:
+                data = json.loads(item) if isinstance(item, str) else item
+            except json.JSONDecodeError:
+                summaries[index] = item
+                continue
+            if not isinstance(data, (dict, list)):
+                summaries[index] = str(data)
+                continue
+
+            summary = self.convert_local(data)
+            if summary is None:
+                pending.append((index, data))
+            else:
+                summaries[index] = summary
+
+        if len(pending) > 1:
+            try:
+                batch = self._call_gemini_batch([data for _, data in pending])
+            except (LLMError, ValueError) as e:
+                print(f"Batch conversion failed, converting items individually: {e}")
+                batch = {}
+            for position, (index, data) in enumerate(pending):
+                if batch.get(position):
+                    summaries[index] = batch[position]
+                    self.cache.set(self._cache_key(data), batch[position])
+
+        for index, data in pending:
+            if summaries[index] is None:
+                summaries[index] = self.convert(data)
+        return summaries
+
+    def _cache_key(self, data: dict | list) -> str:
+        """Digest of the canonical JSON of the data, the prompt template and the model."""
+        return ResponseCache.make_key(self._PROMPT_TEMPLATE, self.llm.model_for("gemini"), data)
+
+    def _create_prompt(self, data: dict | list) -> str:
+        """Builds the instruction prompt for the Gemini API from the minimized data."""
+        json_str = self.minimizer.minimize(data)
+        return self._PROMPT_TEMPLATE.format(json_str=json_str)
+
+    def _call_gemini_batch(self, items: List[dict | list]) -> Dict[int, str]:
+        """Summarizes several items in one request; returns summaries by position in items."""
+        # Split the prompt budget between the items
+        budget = max(500, self.minimizer.token_budget // len(items))
+        results = "\n\n".join(
+            f"    Result {index}:\n    {self.minimizer.minimize(data, budget)}" for index, data in enumerate(items)
+        )
+        prompt = self._BATCH_PROMPT_TEMPLATE.format(count=len(items), results=results.strip())
+
+        response = json.loads(self._generate(prompt, max_output_tokens=min(8192, 1024 * len(items)), json_output=True))
+        if not isinstance(response, dict) or not isinstance(response.get("summaries"), list):
+            raise ValueError("Batch response has no summaries list")
+
+        summaries = {}
+        for entry in response["summaries"]:
+            if isinstance(entry, dict) and isinstance(entry.get("index"), int) and isinstance(entry.get("summary"), str):
+                if 0 <= entry["index"] < len(items):
+                    summaries[entry["index"]] = self._clean_response(entry["summary"])
+        return summaries
+
+    def _call_gemini_api(self, prompt: str) -> str:
+        """Sends the request to the Gemini API over the shared LLM client."""
+        # Clean up response by removing any markdown artifacts
+        return self._clean_response(self._generate(prompt))
+
+    def _generate(self, prompt: str, max_output_tokens: int = 1024, json_output: bool = False) -> str:
+        """Calls Gemini with the converter's sampling and safety settings."""
+        generation_config = {
+            "temperature": 0.2,
+            "maxOutputTokens": max_output_tokens,
+            "topP": 0.8,
+            "topK": 40
+        }
+        if json_output:
+            generation_config["response_mime_type"] = "application/json"
+        safety_settings = [
+            {
+                "category": "HARM_CATEGORY_HARASSMENT",
+                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+            },
+            {
+                "category": "HARM_CATEGORY_HATE_SPEECH", 
+                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+            },
+            {
+                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+            },
+            {
+                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+                "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+            }
+        ]
+        
+        # Thinking tokens count against maxOutputTokens and would truncate the summary (or its JSON)
+        return self.llm.gemini_generate(
+            [{"parts": [{"text": prompt}]}],
+            generation_config,
+            thinking_budget=0,
+            safetySettings=safety_settings
+        )
+
+    def _clean_response(self, text: str) -> str:
+        """Strips markdown artifacts from the generated summary."""
+        return text.replace('###', '').replace('**', '').replace('*', '').strip()
+
+
+# Example usage
+if __name__ == "__main__":
+    converter = JsonToNaturalLanguage()
+    
+    # Example 1: LinkedIn post JSON
+    linkedin_json = {
+        "status": "SUCCESS",
+        "content": [
+            {
+                "type": "text",
+                "text": "{\"id\": \"21d7737d-95e3-4798-9272-2c3e95c99314\", \"actionId\": \"63508e62-bea0-41b6-8733-8e83c6aba234\", \"serverId\": \"583783e7-ed66-4f50-90c3-520536daf7bc\", \"instructions\": \"Post an update on LinkedIn about MCP servers.\", \"parameters\": {\"comment\": \"Exciting news for IT professionals! We're diving deep into the capabilities of MCP servers, exploring how they streamline operations, enhance security, and boost performance for modern infrastructures. What are your experiences or insights with MCP servers? Share below! #MCP #ServerManagement #ITInfrastructure #TechInnovation\", \"instructions\": \"Post an update on LinkedIn about MCP servers.\", \"visibility__code\": \"CONNECTIONS\"}, \"resolvedParameters\": {\"comment\": {\"value\": \"Exciting news for IT professionals! We're diving deep into the capabilities of MCP servers, exploring how they streamline operations, enhance security, and boost performance for modern infrastructures. What are your experiences or insights with MCP servers? Share below! #MCP #ServerManagement #ITInfrastructure #TechInnovation\", \"label\": \"Comment\", \"status\": \"locked\", \"reason\": \"top-level-hint\"}, \"visibility__code\": {\"value\": \"connections-only\", \"label\": \"Connections-only\", \"status\": \"guessed\", \"reason\": \"llm-guess\"}}, \"status\": \"SUCCESS\", \"created\": \"2025-09-17T07:31:54.730Z\", \"invocationId\": \"8dc21e29-4216-4e48-be0e-77b07ba504b0\", \"feedbackUrl\": \"https://mcp.zapier.com/api/mcp/s/NjMwZDhjNDQtZTRkYy00YzY3LWIyNGYtZDZhYmIxNThlMjlmOmIxODkzODYyLWY5ZWMtNGY1MC1hZGQ5LWVjYThlYjhiYzRjNA==/mcp\", \"result\": {\"url\": \"https://www.linkedin.com/feed/update/urn:li:share:7373982013701222400/\"}, \"isPreview\": false}"
+            }
+        ]
+    }
+    
+    # Example 2: Gmail emails JSON
+    gmail_json = {
+        "status": "SUCCESS",
+        "content": [
+            {
+                "type": "text",
+                "text": "{\"id\": \"6beeee3b-c942-45b7-99ce-7973744bb065\", \"actionId\": \"eef51b9e-1044-463c-98d4-bd68db3e4d07\", \"serverId\": \"583783e7-ed66-4f50-90c3-520536daf7bc\", \"instructions\": \"Find the most recent emails in the user's Gmail inbox.\", \"parameters\": {\"query\": \"in:inbox\"}, \"resolvedParameters\": {\"query\": {\"value\": \"in:inbox\", \"label\": \"Query\", \"status\": \"locked\", \"reason\": \"top-level-hint\"}}, \"status\": \"SUCCESS\", \"created\": \"2025-09-17T07:21:15.355Z\", \"invocationId\": \"9620a4fb-f083-4031-8c84-60d9d539e2b1\", \"isPreview\": false, \"feedbackUrl\": \"https://mcp.zapier.com/api/mcp/s/NjMwZDhjNDQtZTRkYy00YzY3LWIyNGYtZDZhYmIxNThlMjlmOmIxODkzODYyLWY5ZWMtNGY1MC1hZGQ5LWVjYThlYjhiYzRjNA==/mcp\", \"result\": [{\"id\": \"123\", \"message_id\": \"msg123\", \"thread_id\": \"thread123\", \"message_url\": \"https://mail.google.com/mail/u/0/#inbox/msg123\", \"to\": {\"names\": [], \"emails\": [\"imadabathuniharsha@gmail.com\"]}, \"cc\": {\"names\": [], \"emails\": []}, \"from\": {\"name\": \"\", \"email\": \"imadabathuniharsha@gmail.com\"}, \"reply_to\": {\"name\": \"\", \"email\": \"\"}, \"subject\": \"Regarding MCP\", \"body_plain\": \"Hello, I wanted to discuss the MCP implementation.\", \"date\": \"2025-09-16T10:30:00Z\", \"labels\": [\"UNREAD\", \"INBOX\"], \"attachment_count\": 0, \"all_attachments\": null}]}"
+            }
+        ]
+    }
+    
+    print("LinkedIn Conversion Result:")
+    result1 = converter.convert(linkedin_json)
+    print(result1)
+    
+    print("\n" + "="*50 + "\n")
+    
+    print("Gmail Conversion Result:")
+    result2 = converter.convert(gmail_json)
     print(result2)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+class EventBus:
+    """Fan-out of server events (titles, summaries) to SSE subscribers in every worker process.
+
+    Published events are appended to a SQLite file shared by the gunicorn workers; each
+    process polls it on one background thread and hands new events to its own
+    subscribers. Every subscriber gets its own bounded queue; a subscriber that stops
+    reading loses events once its queue is full rather than holding up publishers. If
+    the shared file cannot be used, events only reach subscribers of the same worker.
+    """
+
+    # Events older than this are deleted; pollers only ever read a few seconds back
+    RETENTION_SECONDS = 300
+
+    def __init__(self, max_queue: int = None, db_path: str = None, poll_interval: float = None):
+        self.max_queue = max_queue or int(os.getenv("EVENT_BUS_QUEUE_SIZE", 100))
+        self.db_path = db_path or os.getenv("EVENT_BUS_PATH") or os.path.join(tempfile.gettempdir(), "tensora_events.db")
+        self.poll_interval = poll_interval or float(os.getenv("EVENT_BUS_POLL_SECONDS", 0.5))
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = None
+        self._last_id = 0
+
+        self.published = 0
+        self.dropped = 0
+
+        try:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                           "event TEXT, published_at REAL)")
+            self.shared = True
+        except sqlite3.Error as e:
+            print(f"⚠️ Shared event store unavailable, events only reach this worker's subscribers: {e}")
+            self.shared = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a fresh connection: committed or rolled back, then always closed"""
+        db = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def subscribe(self) -> queue.Queue:
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self.shared and self._poller is None:
+                # Start from the current end so only events published from now on are delivered
+                self._last_id = self._latest_id()
+                self._poller = threading.Thread(target=self._poll, daemon=True, name="event-bus")
+                self._poller.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: Dict):
+        """Publish event to subscribers on every worker without blocking on them"""
+        with self._lock:
+            self.published += 1
+        if self.shared:
+            try:
+                now = time.time()
+                with self._connect() as db:
+                    db.execute("INSERT INTO events (event, published_at) VALUES (?, ?)", (json.dumps(event), now))
+                    db.execute("DELETE FROM events WHERE published_at < ?", (now - self.RETENTION_SECONDS,))
+                return
+            except sqlite3.Error as e:
+                print(f"⚠️ Failed to share event with other workers: {e}")
+        self._deliver(event)
+
+    def _deliver(self, event: Dict):
+        """Hand event to every subscriber of this process"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+
+    def _latest_id(self) -> int:
+        try:
+            with self._connect() as db:
+                return db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"⚠️ Event store read failed: {e}")
+            return 0
+
+    def _poll(self):
+        """Deliver events published by any worker since the poller started"""
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self._connect() as db:
+                    rows = db.execute("SELECT id, event FROM events WHERE id > ? ORDER BY id", (self._last_id,)).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️ Event store read failed: {e}")
+                continue
+            for event_id, event in rows:
+                self._last_id = event_id
+                self._deliver(json.loads(event))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': self.dropped,
+                'shared': self.shared,
+                'db_path': self.db_path
+            }
+
+# Global instance
+event_bus = EventBus()
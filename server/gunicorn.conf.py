@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the MCP proxy server
+
+Runs the Flask app on gevent workers so upstream I/O (MCP servers, Gemini, Modal)
+and long-lived SSE streams are served as cooperative greenlets instead of holding
+an OS thread each. Usage from the project root:
+
+    gunicorn -c server/gunicorn.conf.py proxy:app
+"""
+
+import os
+
+# Import the app from the server directory so sibling modules resolve
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = f"0.0.0.0:{os.getenv('PORT', 4000)}"
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+
+# Concurrent greenlets (open requests and SSE streams) per gevent worker
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+def post_fork(server, worker):
+    """Make gRPC (Google Cloud Speech) cooperate with the gevent hub"""
+    if worker_class == "gevent":
+        try:
+            import grpc.experimental.gevent as grpc_gevent
+            grpc_gevent.init_gevent()
+        except ImportError as e:
+            print(f"⚠️ Could not enable gRPC gevent support: {e}")
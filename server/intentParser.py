@@ -176,21 +176,27 @@ Respond directly as a helpful assistant. Do NOT suggest using tools or mention a
 
 RESPONSE FORMAT: Respond with plain text, no JSON structure needed."""
 
+        return self.get_tool_system_prompt(tools_info, user_prompt)
+
+    def get_tool_system_prompt(self, tools_info: List[Dict], user_prompt: Optional[str] = None) -> str:
+        """Tool-mode system prompt. Without user_prompt it depends only on the tools, so it can be
+        cached provider-side and the request sent as its own turn."""
         tools_info_str = json.dumps(tools_info, indent=2) if tools_info else "[]"
+        user_request = f'\nUSER REQUEST: "{user_prompt}"\n' if user_prompt is not None else ""
         
         return f"""You are an expert AI assistant that helps users accomplish tasks using available tools.
 
 AVAILABLE TOOLS:
 {tools_info_str}
-
-USER REQUEST: "{user_prompt}"
-
+{user_request}
 YOUR TASK:
 1. Analyze the user's request and break it down into specific actions
 2. For each action, select the most appropriate tool
 3. Generate detailed, high-quality content for content creation tasks
 4. Extract all necessary parameters from the user's request
 5. If the request involves multiple steps, create a sequence of actions
+6. Independent actions run in parallel; give an action an "id" and list the ids of the
+   actions it must wait for in "depends_on" (e.g. when it uses another action's result)
 
 RESPONSE FORMAT:
 
@@ -199,9 +205,11 @@ Return a JSON object with this structure:
   "plan": "Brief description of your overall plan",
   "actions": [
     {{
+      "id": "short_unique_id",  // Referenced by other actions' depends_on
       "tool": "exact_name_of_tool",
       "reasoning": "Why this tool is appropriate",
-      "parameters": {{ ... }}  // All required parameters with detailed values
+      "parameters": {{ ... }},  // All required parameters with detailed values
+      "depends_on": []  // ids of actions that must finish first; empty if independent
     }}
   ],
   "confidence": 0-100  // Your confidence in this plan
@@ -0,0 +1,90 @@
+import json
+import os
+import re
+from typing import Any, Iterable, Optional
+
+UUID_PATTERN = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Keys that carry no user-relevant information in MCP/Zapier tool results
+DEFAULT_NOISE_KEYS = (
+    "actionId", "serverId", "invocationId", "feedbackUrl", "resolvedParameters",
+    "isPreview", "message_id", "thread_id", "_meta"
+)
+
+class JsonMinimizer:
+    """Shrinks tool output to fit a token budget before it is embedded in an LLM prompt.
+
+    Nested JSON strings are decoded, noise keys and bare UUIDs are dropped, whitespace is
+    collapsed and long arrays are cut to their first items plus a count. If the result is
+    still over budget, array and string limits are tightened step by step.
+    """
+
+    # (max array items, max string chars), loosest first
+    LIMITS = ((50, 2000), (20, 1000), (10, 400), (5, 200), (3, 100), (1, 60))
+
+    def __init__(self, token_budget: int = None, noise_keys: Optional[Iterable[str]] = None):
+        self.token_budget = token_budget or int(os.getenv("CONVERTER_PROMPT_TOKEN_BUDGET", 4000))
+        if noise_keys is None:
+            configured = os.getenv("CONVERTER_NOISE_KEYS")
+            noise_keys = [key.strip() for key in configured.split(",") if key.strip()] if configured else DEFAULT_NOISE_KEYS
+        self.noise_keys = set(noise_keys)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (about four characters per token)"""
+        return (len(text) + 3) // 4
+
+    def minimize(self, data: Any, token_budget: Optional[int] = None) -> str:
+        """Return compact JSON for data that fits within token_budget (default: the configured budget)"""
+        token_budget = token_budget or self.token_budget
+        cleaned = self._clean(data)
+        text = ""
+        for max_items, max_chars in self.LIMITS:
+            text = json.dumps(self._truncate(cleaned, max_items, max_chars), separators=(",", ":"), ensure_ascii=False)
+            if self.estimate_tokens(text) <= token_budget:
+                return text
+
+        # Still too large at the tightest limits; cut the text itself
+        max_chars = token_budget * 4
+        return text[:max_chars] + f"... [truncated {len(text) - max_chars} characters]"
+
+    def _clean(self, value: Any) -> Any:
+        """Decode nested JSON strings, drop noise and collapse whitespace"""
+        if isinstance(value, str):
+            stripped = value.strip()
+            if stripped[:1] in ("{", "["):
+                try:
+                    return self._clean(json.loads(stripped))
+                except json.JSONDecodeError:
+                    pass
+            return WHITESPACE_PATTERN.sub(" ", stripped)
+        if isinstance(value, dict):
+            cleaned = {}
+            for key, item in value.items():
+                if key in self.noise_keys or (isinstance(item, str) and UUID_PATTERN.match(item)):
+                    continue
+                item = self._clean(item)
+                if item in (None, "", [], {}):
+                    continue
+                cleaned[key] = item
+            return cleaned
+        if isinstance(value, list):
+            return [self._clean(item) for item in value]
+        return value
+
+    def _truncate(self, value: Any, max_items: int, max_chars: int) -> Any:
+        """Apply array and string length limits"""
+        if isinstance(value, str):
+            return value if len(value) <= max_chars else value[:max_chars] + "..."
+        if isinstance(value, dict):
+            return {key: self._truncate(item, max_items, max_chars) for key, item in value.items()}
+        if isinstance(value, list):
+            kept = [self._truncate(item, max_items, max_chars) for item in value[:max_items]]
+            if len(value) > max_items:
+                kept.append(f"... {len(value) - max_items} more items ({len(value)} total)")
+            return kept
+        return value
+
+# Global instance
+json_minimizer = JsonMinimizer()
@@ -0,0 +1,241 @@
+import json
+import os
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterator, List, Optional
+from sse_parser import iter_sse_events
+
+# Load environment variables from a .env file
+load_dotenv()
+
+class LLMError(Exception):
+    """Raised when an LLM provider call fails or returns an unusable response.
+
+    status is the provider's HTTP status code when it answered with an error.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class LLMClient:
+    """Shared client for every LLM provider (Gemini, Modal, OpenAI, Claude, Groq).
+
+    Owns one keep-alive connection pool for all provider hosts, default models,
+    timeouts and response parsing, so callers only deal in prompts and text.
+    """
+
+    GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:{method}"
+    GEMINI_RESOURCE_URL = "https://generativelanguage.googleapis.com/v1beta/{path}"
+    OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+    CLAUDE_URL = "https://api.anthropic.com/v1/messages"
+    GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+    MODAL_URL = "https://imadabathuniharsha--llama3-serve-optimized-model-web-generate.modal.run"
+
+    DEFAULT_MODELS = {
+        "gemini": "gemini-2.5-flash",
+        "openai": "gpt-3.5-turbo",
+        "claude": "claude-3-haiku-20240307",
+        "groq": "llama3-8b-8192"
+    }
+
+    # Gemini models that think by default and accept any thinkingBudget, including 0
+    GEMINI_THINKING_MODELS = ("gemini-2.5-flash",)
+
+    def __init__(self, pool_size: int = None, timeout: float = None):
+        self.pool_size = pool_size or int(os.getenv("LLM_POOL_SIZE", 10))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", 60))
+        self.modal_url = os.getenv("MODAL_ENDPOINT", self.MODAL_URL)
+
+        self.api_keys = {
+            "gemini": os.getenv("GEMINI_API_KEY"),
+            "openai": os.getenv("OPENAI_API_KEY"),
+            "claude": os.getenv("CLAUDE_API_KEY"),
+            "groq": os.getenv("GROQ_API_KEY")
+        }
+        self.models = {
+            provider: os.getenv(f"{provider.upper()}_MODEL", model)
+            for provider, model in self.DEFAULT_MODELS.items()
+        }
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.DEFAULT_MODELS) + 1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def model_for(self, provider: str, model: Optional[str] = None) -> str:
+        """Return the requested model, or the provider's configured default"""
+        return model or self.models.get(provider, self.models["gemini"])
+
+    def has_key(self, provider: str) -> bool:
+        return bool(self.api_keys.get(provider))
+
+    def _post(self, provider: str, url: str, body: Optional[Dict], headers: Optional[Dict] = None,
+              timeout: Optional[float] = None, stream: bool = False, method: str = "POST") -> requests.Response:
+        """POST (or another method) to a provider over the shared pool, raising LLMError on failure"""
+        try:
+            response = self.session.request(method, url, headers=headers, json=body, stream=stream,
+                                            timeout=timeout or self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise LLMError(f"{provider.capitalize()} API request failed: {e}")
+
+        if not response.ok:
+            message = None
+            try:
+                error_data = response.json()
+                # Streaming errors may arrive as a one-element array
+                if isinstance(error_data, list):
+                    error_data = error_data[0] if error_data else {}
+                error = error_data.get("error")
+                message = error.get("message") if isinstance(error, dict) else error
+            except ValueError:
+                pass
+            finally:
+                response.close()
+            raise LLMError(f"{provider.capitalize()} API error: {message or response.reason}", response.status_code)
+        return response
+
+    def _gemini_headers(self) -> Dict[str, str]:
+        """Gemini authentication; the key goes in a header so it never appears in URLs or error text"""
+        if not self.api_keys["gemini"]:
+            raise LLMError("Gemini API key not configured")
+        return {"x-goog-api-key": self.api_keys["gemini"]}
+
+    def _gemini_url(self, model: Optional[str], method: str) -> str:
+        return self.GEMINI_URL.format(model=self.model_for("gemini", model), method=method)
+
+    @staticmethod
+    def _gemini_text(data: Dict) -> str:
+        """Extract the first candidate's text from a Gemini response"""
+        try:
+            return data["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"Unexpected Gemini response structure: {json.dumps(data)[:500]}")
+
+    def gemini_generate(self, contents: List[Dict], generation_config: Optional[Dict] = None,
+                        model: Optional[str] = None, timeout: Optional[float] = None,
+                        thinking_budget: Optional[int] = None, **extra) -> str:
+        """Call Gemini generateContent and return the generated text.
+
+        thinking_budget caps a thinking model's reasoning tokens, which otherwise count
+        against maxOutputTokens; 0 turns thinking off. extra is merged into the request
+        body (e.g. safetySettings).
+        """
+        body = {"contents": contents, **extra}
+        if thinking_budget is not None and self.model_for("gemini", model).startswith(self.GEMINI_THINKING_MODELS):
+            generation_config = {**(generation_config or {}), "thinkingConfig": {"thinkingBudget": thinking_budget}}
+        if generation_config:
+            body["generationConfig"] = generation_config
+        response = self._post("gemini", self._gemini_url(model, "generateContent"), body,
+                              headers=self._gemini_headers(), timeout=timeout)
+        return self._gemini_text(response.json())
+
+    def gemini_stream(self, contents: List[Dict], generation_config: Optional[Dict] = None,
+                      model: Optional[str] = None, timeout: Optional[float] = None,
+                      on_response: Optional[Callable[[requests.Response], None]] = None, **extra) -> Iterator[str]:
+        """Call Gemini streamGenerateContent and yield text as it is generated.
+
+        on_response receives the open upstream response, so a caller can close it from
+        another thread to stop generation early. extra is merged into the request body.
+        """
+        body = {"contents": contents, **extra}
+        if generation_config:
+            body["generationConfig"] = generation_config
+        response = self._post("gemini", self._gemini_url(model, "streamGenerateContent") + "?alt=sse",
+                              body, headers=self._gemini_headers(), timeout=timeout, stream=True)
+        if on_response:
+            on_response(response)
+        try:
+            lines = (line.decode("utf-8", errors="replace") for line in response.iter_lines())
+            for event in iter_sse_events(lines):
+                chunk = json.loads(event["data"])
+                candidates = chunk.get("candidates") or [{}]
+                for part in candidates[0].get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+        finally:
+            response.close()
+
+    def _gemini_resource_url(self, path: str) -> str:
+        return self.GEMINI_RESOURCE_URL.format(path=path)
+
+    def gemini_create_cache(self, contents: List[Dict], ttl: float, model: Optional[str] = None) -> Dict:
+        """Create a Gemini cachedContents entry holding contents; returns its name and expireTime"""
+        response = self._post("gemini", self._gemini_resource_url("cachedContents"), {
+            "model": f"models/{self.model_for('gemini', model)}",
+            "contents": contents,
+            "ttl": f"{int(ttl)}s"
+        }, headers=self._gemini_headers())
+        return response.json()
+
+    def gemini_update_cache_ttl(self, name: str, ttl: float) -> Dict:
+        """Extend a cachedContents entry to expire ttl seconds from now"""
+        response = self._post("gemini", self._gemini_resource_url(name) + "?updateMask=ttl",
+                              {"ttl": f"{int(ttl)}s"}, headers=self._gemini_headers(), method="PATCH")
+        return response.json()
+
+    def gemini_delete_cache(self, name: str):
+        self._post("gemini", self._gemini_resource_url(name), None, headers=self._gemini_headers(), method="DELETE").close()
+
+    def modal_generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Call the Modal-hosted Llama endpoint and return its response text"""
+        response = self._post("modal", self.modal_url, {"prompt": prompt}, timeout=timeout)
+        return response.json().get("response", "No response from Modal endpoint")
+
+    def chat(self, provider: str, system: str, user: str, model: Optional[str] = None,
+             temperature: float = 0.7, max_tokens: int = 1000, timeout: Optional[float] = None,
+             thinking_budget: Optional[int] = None) -> str:
+        """Send one system + user exchange to a provider's chat API and return the reply text.
+
+        thinking_budget is passed to Gemini (see gemini_generate) and ignored by other providers.
+        """
+        model = self.model_for(provider, model)
+
+        if provider == "gemini":
+            # Gemini gets the system prompt inline ahead of the user text
+            return self.gemini_generate(
+                [{"parts": [{"text": f"{system}\n\n{user}"}]}],
+                {"temperature": temperature, "maxOutputTokens": max_tokens},
+                model=model,
+                timeout=timeout,
+                thinking_budget=thinking_budget
+            )
+
+        if provider in ("openai", "groq"):
+            url = self.OPENAI_URL if provider == "openai" else self.GROQ_URL
+            response = self._post(provider, url, {
+                "model": model,
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user}
+                ],
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }, headers={"Authorization": f"Bearer {self.api_keys[provider]}"}, timeout=timeout)
+            try:
+                return response.json()["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                raise LLMError(f"Unexpected {provider} response structure")
+
+        if provider == "claude":
+            response = self._post(provider, self.CLAUDE_URL, {
+                "model": model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "system": system,
+                "messages": [{"role": "user", "content": user}]
+            }, headers={"x-api-key": self.api_keys["claude"], "anthropic-version": "2023-06-01"}, timeout=timeout)
+            try:
+                return response.json()["content"][0]["text"]
+            except (KeyError, IndexError, TypeError):
+                raise LLMError("Unexpected claude response structure")
+
+        if provider == "modal":
+            return self.modal_generate(f"{system}\n\n{user}", timeout=timeout)
+
+        raise LLMError(f"Unknown LLM provider: {provider}")
+
+# Global instance
+llm_client = LLMClient()
@@ -0,0 +1,309 @@
+import os
+import hashlib
+import itertools
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional, Tuple
+from sse_parser import read_jsonrpc_response
+from server_health import health_tracker
+from bulkhead import bulkheads, BulkheadFullError
+
+class MCPSession:
+    """A persistent MCP session with one server.
+
+    Performs the initialize handshake once, reuses the Mcp-Session-Id for every request,
+    allocates JSON-RPC ids atomically and tracks in-flight requests by id so concurrent
+    calls share the server's pooled keep-alive connections and are matched back by id.
+    """
+
+    PROTOCOL_VERSION = "2025-03-26"
+
+    def __init__(self, client: "MCPClient", url: str, headers: Optional[Dict] = None):
+        self.client = client
+        self.url = url
+        # Caller headers (e.g. Authorization) this session was opened with; other callers get their own session
+        self.headers = dict(headers or {})
+        self.session_id = None
+        self.protocol_version = self.PROTOCOL_VERSION
+        self.initialized = False
+
+        self._ids = itertools.count(1)
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        # In-flight token -> {"id", "method", "started_at", "probe"}; tokens are ours, while
+        # JSON-RPC ids may come from the client (rawPayload) and repeat across requests
+        self.in_flight = {}
+
+    def next_id(self) -> str:
+        """Allocate the next JSON-RPC id for this session"""
+        with self._lock:
+            return str(next(self._ids))
+
+    def session_headers(self) -> Dict[str, str]:
+        """Headers identifying this session on every request"""
+        headers = {"MCP-Protocol-Version": self.protocol_version}
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        return headers
+
+    def ensure_initialized(self, headers: Optional[Dict] = None):
+        """Run the initialize handshake once; servers that reject it are used sessionless"""
+        if self.initialized:
+            return
+        with self._init_lock:
+            if self.initialized:
+                return
+            payload = {
+                "jsonrpc": "2.0",
+                "id": self.next_id(),
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": self.PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "tensora-mcp-proxy", "version": "1.0.0"}
+                }
+            }
+            response = self.client.post(self.url, payload, headers=headers, stream=True, timeout=30)
+            try:
+                if not response.ok:
+                    print(f"⚠️ MCP initialize returned {response.status_code} for {self.url}, continuing without a session")
+                    self.initialized = True
+                    return
+                result = read_jsonrpc_response(response, payload["id"])
+                self.session_id = response.headers.get("Mcp-Session-Id")
+                if isinstance(result, dict) and isinstance(result.get("result"), dict):
+                    self.protocol_version = result["result"].get("protocolVersion", self.PROTOCOL_VERSION)
+            except Exception as e:
+                print(f"⚠️ MCP initialize failed for {self.url}, continuing without a session: {e}")
+                self.initialized = True
+                return
+            finally:
+                response.close()
+
+            self.client.post(
+                self.url,
+                {"jsonrpc": "2.0", "method": "notifications/initialized"},
+                headers={**self.session_headers(), **(headers or {})},
+                timeout=30
+            ).close()
+            self.initialized = True
+            print(f"🤝 MCP session initialized for {self.url}" + (f" ({self.session_id})" if self.session_id else ""))
+
+    def reset(self):
+        """Forget the session so the next request re-initializes"""
+        with self._init_lock:
+            self.session_id = None
+            self.initialized = False
+
+    def post(self, payload: Dict[str, Any], headers: Optional[Dict] = None,
+             stream: bool = False, timeout: float = 60) -> Tuple[requests.Response, Optional[str]]:
+        """Send a JSON-RPC message within this session, registering it as in flight.
+
+        Returns (response, token). token identifies the registered request and must be
+        passed to complete() once the response has been read; it is None for notifications
+        and for requests post() has already settled itself (e.g. on a 5xx). Raises CircuitOpenError without touching the network while the server's breaker
+        is open, and BulkheadFullError when the server's concurrency slots and wait queue
+        are exhausted; timeout is replaced by the adaptive p99-based timeout once known.
+        """
+        method = payload.get("method") if isinstance(payload, dict) else None
+        health = health_tracker.get(self.url)
+
+        probe = health.before_request()
+        timeout = health.timeout(timeout, method)
+
+        # Held until complete() for requests, released right away for notifications
+        bulkhead = bulkheads.get(self.url)
+        try:
+            bulkhead.acquire()
+        except BulkheadFullError:
+            # A rejected call says nothing about the server, so hand the probe back
+            if probe:
+                health.release_probe()
+            raise
+
+        request_id = payload.get("id") if isinstance(payload, dict) else None
+        token = None
+        if request_id is not None:
+            with self._lock:
+                token = str(next(self._tokens))
+                self.in_flight[token] = {
+                    "id": request_id,
+                    "method": method,
+                    "started_at": time.monotonic(),
+                    "probe": probe
+                }
+
+        try:
+            self.ensure_initialized(headers)
+            had_session = bool(self.session_id)
+            response = self.client.post(self.url, payload, headers={**self.session_headers(), **(headers or {})},
+                                        stream=stream, timeout=timeout)
+            if response.status_code == 404 and had_session:
+                # The server expired our session; start a new one and retry once
+                print(f"🔄 MCP session expired for {self.url}, re-initializing")
+                response.close()
+                self.reset()
+                self.ensure_initialized(headers)
+                response = self.client.post(self.url, payload, headers={**self.session_headers(), **(headers or {})},
+                                            stream=stream, timeout=timeout)
+        except Exception:
+            health.record_failure()
+            if token is None:
+                bulkhead.release()
+            self.complete(token, success=None)
+            raise
+
+        if response.status_code >= 500:
+            health.record_failure()
+            self.complete(token, success=None)
+            token = None
+        if request_id is None:
+            # Notifications are never completed, so record them on arrival
+            bulkhead.release()
+            if response.status_code < 500:
+                health.record_success(response.elapsed.total_seconds(), method)
+        return response, token
+
+    def complete(self, token: Optional[str], success: Optional[bool] = True):
+        """Remove a request from the in-flight table once its response has been read.
+
+        The full request latency feeds the server's health tracker: success=True records
+        it, False records a failure and None (e.g. a client cancellation) records nothing
+        beyond handing back a half-open probe so the next caller can try the server.
+        """
+        if token is None:
+            return
+        with self._lock:
+            entry = self.in_flight.pop(token, None)
+        if entry is None:
+            return
+
+        bulkheads.get(self.url).release()
+        health = health_tracker.get(self.url)
+        if success is None:
+            if entry.get("probe"):
+                health.release_probe()
+            return
+        if success:
+            health.record_success(time.monotonic() - entry["started_at"], entry["method"])
+        else:
+            health.record_failure()
+
+    def get_stats(self) -> Dict:
+        """Get the session state and in-flight requests"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'session_id': self.session_id,
+                'initialized': self.initialized,
+                'in_flight': [
+                    {'id': entry["id"], 'method': entry["method"], 'elapsed_seconds': round(now - entry["started_at"], 1)}
+                    for entry in self.in_flight.values()
+                ]
+            }
+
+class MCPClient:
+    """Shared HTTP client for MCP servers with a keep-alive connection pool per server URL"""
+
+    DEFAULT_HEADERS = {
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/event-stream",
+        "Connection": "keep-alive"
+    }
+
+    def __init__(self, pool_size: int = None, idle_timeout: float = None, pool_block: bool = None):
+        self.pool_size = pool_size or int(os.getenv("MCP_POOL_SIZE", 10))
+        self.idle_timeout = idle_timeout or float(os.getenv("MCP_POOL_IDLE_TIMEOUT", 300))
+        if pool_block is None:
+            pool_block = os.getenv("MCP_POOL_BLOCK", "false").lower() == "true"
+        self.pool_block = pool_block
+
+        self._pools = {}  # server url -> {"session": Session, "last_used": float}
+        self._mcp_sessions = {}  # server url -> MCPSession
+        self._lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """Create a session whose adapter keeps at most pool_size idle connections"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=self.pool_block
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.DEFAULT_HEADERS)
+        return session
+
+    def _evict_idle(self, now: float):
+        """Close pools that have not been used within idle_timeout (caller holds the lock)"""
+        expired = [url for url, pool in self._pools.items()
+                   if now - pool["last_used"] > self.idle_timeout]
+        for url in expired:
+            pool = self._pools.pop(url)
+            pool["session"].close()
+            print(f"♻️ Evicted idle MCP connection pool: {url}")
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the pooled session for a server URL, creating it on first use"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            pool = self._pools.get(url)
+            if pool is None:
+                pool = {"session": self._create_session(), "last_used": now}
+                self._pools[url] = pool
+            pool["last_used"] = now
+            return pool["session"]
+
+    def post(self, url: str, payload: Dict[str, Any], headers: Optional[Dict] = None,
+             stream: bool = False, timeout: float = 60) -> requests.Response:
+        """POST a JSON payload to an MCP server over its pooled connection"""
+        session = self.get_session(url)
+        return session.post(url, headers=headers or {}, json=payload, stream=stream, timeout=timeout)
+
+    @staticmethod
+    def session_key(url: str, headers: Optional[Dict] = None) -> str:
+        """Sessions are per server URL and per set of caller headers, so credentials never share a session"""
+        if not headers:
+            return url
+        canonical = json.dumps(sorted((str(k).lower(), str(v)) for k, v in headers.items()))
+        return f"{url}#{hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]}"
+
+    def session(self, url: str, headers: Optional[Dict] = None) -> MCPSession:
+        """Return the persistent MCP session for a server URL and the caller's headers"""
+        key = self.session_key(url, headers)
+        with self._lock:
+            mcp_session = self._mcp_sessions.get(key)
+            if mcp_session is None:
+                mcp_session = MCPSession(self, url, headers)
+                self._mcp_sessions[key] = mcp_session
+            return mcp_session
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for pool in self._pools.values():
+                pool["session"].close()
+            self._pools.clear()
+
+    def get_stats(self) -> Dict:
+        """Get statistics about the open connection pools"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'idle_timeout': self.idle_timeout,
+                'pools': [
+                    {'url': url, 'idle_seconds': round(now - pool["last_used"], 1)}
+                    for url, pool in self._pools.items()
+                ],
+                'sessions': {key: mcp_session.get_stats() for key, mcp_session in self._mcp_sessions.items()}
+            }
+
+# Global instance
+mcp_client = MCPClient()
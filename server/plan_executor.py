@@ -0,0 +1,168 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional, Set
+
+class PlanExecutor:
+    """Runs AI plan actions concurrently, ordering dependent steps with depends_on"""
+
+    # How often a plan with actions waiting on a busy server retries for a slot
+    THROTTLE_POLL_SECONDS = 0.05
+
+    def __init__(self, max_workers: int = None, per_server_limit: int = None, slot_timeout: float = None):
+        self.max_workers = max_workers or int(os.getenv("PLAN_MAX_WORKERS", 8))
+        self.per_server_limit = per_server_limit or int(os.getenv("PLAN_PER_SERVER_CONCURRENCY", 4))
+        # Longest a plan waits for another plan to free a server slot before failing the action
+        self.slot_timeout = slot_timeout or float(os.getenv("PLAN_SLOT_TIMEOUT", 60))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plan")
+        self._server_limits = {}  # server url -> BoundedSemaphore
+        self._lock = threading.Lock()
+
+    def _server_limit(self, server: Optional[str]) -> threading.BoundedSemaphore:
+        """Get the semaphore capping concurrent actions against one server"""
+        with self._lock:
+            limit = self._server_limits.get(server)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.per_server_limit)
+                self._server_limits[server] = limit
+            return limit
+
+    def resolve_dependencies(self, actions: List[Dict]) -> List[Set[int]]:
+        """Map each action's depends_on (plan indices or action ids) to a set of plan indices"""
+        ids = {}
+        for index, action in enumerate(actions):
+            if isinstance(action, dict) and action.get("id") is not None:
+                ids[str(action["id"])] = index
+
+        dependencies = []
+        for index, action in enumerate(actions):
+            depends_on = action.get("depends_on") if isinstance(action, dict) else None
+            if depends_on is None:
+                depends_on = []
+            elif not isinstance(depends_on, list):
+                depends_on = [depends_on]
+
+            resolved = set()
+            for dependency in depends_on:
+                # bool is an int subclass, but True is not a plan index
+                if isinstance(dependency, int) and not isinstance(dependency, bool) and 0 <= dependency < len(actions):
+                    resolved.add(dependency)
+                elif str(dependency) in ids:
+                    resolved.add(ids[str(dependency)])
+                else:
+                    raise ValueError(f"Action {index} depends on unknown action '{dependency}'")
+            if index in resolved:
+                raise ValueError(f"Action {index} depends on itself")
+            dependencies.append(resolved)
+
+        return dependencies
+
+    def execute(self, actions: List[Dict], run_action: Callable[[Dict], Dict],
+                server_for: Callable[[Dict], Optional[str]] = lambda action: None,
+                on_event: Optional[Callable[[str, int, Dict], None]] = None,
+                cancelled: Optional[Callable[[], bool]] = None) -> List[Dict]:
+        """Execute actions as a dependency graph and return their results in plan order.
+
+        run_action(action) returns a result dict with a "success" flag; an action whose
+        dependency failed is not run and is reported as failed instead. on_event, if given,
+        is called with ("started", index, None) from the worker thread as an action begins
+        and with ("completed" or "failed", index, result) as each action settles. Once
+        cancelled() returns True no further actions are started; running ones finish and
+        the rest are reported as failed.
+        """
+        dependencies = self.resolve_dependencies(actions)
+        results: List[Any] = [None] * len(actions)
+        pending = set(range(len(actions)))
+        running = {}  # future -> plan index
+
+        def emit(event, index, result=None):
+            if on_event:
+                try:
+                    on_event(event, index, result)
+                except Exception as e:
+                    print(f"⚠️ Plan event handler failed: {e}")
+
+        def settle(index, result):
+            results[index] = result
+            emit("completed" if result.get("success") else "failed", index, result)
+
+        def run(index, action, limit):
+            # The server slot was taken before submitting, so pool workers never block on it
+            try:
+                emit("started", index)
+                return run_action(action)
+            finally:
+                limit.release()
+
+        def start(index, limit):
+            running[self._executor.submit(run, index, actions[index], limit)] = index
+            pending.discard(index)
+
+        while pending or running:
+            if cancelled and cancelled() and pending:
+                for index in sorted(pending):
+                    settle(index, self._failed_result(actions[index], "Cancelled before it started"))
+                pending.clear()
+
+            # Fail actions whose dependencies failed, then start every ready action whose
+            # server has a free slot; repeat until settled since a skipped action can fail
+            # its own dependents
+            throttled = []  # ready actions waiting on a server slot
+            changed = True
+            while changed:
+                changed = False
+                throttled = []
+                for index in sorted(pending):
+                    failed = [d for d in dependencies[index] if results[d] is not None and not results[d].get("success")]
+                    if failed:
+                        settle(index, self._failed_result(actions[index], f"Skipped because action {failed[0]} failed"))
+                        pending.discard(index)
+                        changed = True
+                    elif all(results[d] is not None for d in dependencies[index]):
+                        limit = self._server_limit(server_for(actions[index]))
+                        if limit.acquire(blocking=False):
+                            start(index, limit)
+                        else:
+                            throttled.append((index, limit))
+
+            if not running:
+                if throttled:
+                    # Other plans hold every slot; wait here on the request thread, not in the pool
+                    index, limit = throttled[0]
+                    if limit.acquire(timeout=self.slot_timeout):
+                        start(index, limit)
+                    else:
+                        settle(index, self._failed_result(
+                            actions[index], f"Timed out after {self.slot_timeout:g}s waiting for a free slot on its server"))
+                        pending.discard(index)
+                    continue
+                # Anything still pending waits on itself through a cycle
+                for index in pending:
+                    settle(index, self._failed_result(actions[index], "Skipped because of a dependency cycle"))
+                pending.clear()
+                break
+
+            # Throttled actions may get a slot freed by another plan, so check back periodically
+            done, _ = wait(running, timeout=self.THROTTLE_POLL_SECONDS if throttled else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                try:
+                    settle(index, future.result())
+                except Exception as action_error:
+                    print("Error executing action:", action_error)
+                    settle(index, self._failed_result(actions[index], str(action_error)))
+
+        return results
+
+    def _failed_result(self, action: Dict, error: str) -> Dict:
+        """Build the failure result for an action that did not complete"""
+        return {
+            "action": action.get("tool") if isinstance(action, dict) else None,
+            "success": False,
+            "error": error
+        }
+
+# Global instance
+plan_executor = PlanExecutor()
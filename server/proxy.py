@@ -2,6 +2,8 @@ import os
 import json
 import re
 import time
+import queue
+import threading
 import requests
 from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
@@ -17,8 +19,8 @@ app = Flask(__name__)
 # Configure CORS to allow requests from your frontend
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:4000", "*"])
 
-# Make sure the path to your key is correct relative to where you run the script
-CREDENTIALS_PATH = "server/gcp_key.json"
+# Resolve the key next to this file so it is found regardless of the working directory
+CREDENTIALS_PATH = str(Path(__file__).parent / "gcp_key.json")
 
 client = None
 try:
@@ -29,9 +31,6 @@ except Exception as e:
     print(f"❌ FATAL ERROR: Could not initialize Google Cloud client. Check your gcp_key.json path and content.")
     print(f"DETAILS: {e}")
 
-# Your Modal endpoint URL - replace with your actual Modal endpoint
-MODAL_ENDPOINT = "https://imadabathuniharsha--llama3-serve-optimized-model-web-generate.modal.run"
-
 # Speech-to-text endpoint
 @app.route("/speech-to-text", methods=["POST"])
 def speech_to_text():
@@ -80,9 +79,6 @@ def speech_to_text():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
-# Global counter for JSON-RPC IDs
-rpc_counter = 1
-
 # Load MCP servers configuration
 def load_mcp_config():
     config_path = Path(__file__).parent / "config.json"
@@ -102,6 +98,35 @@ def load_mcp_config():
 
 mcp_config = load_mcp_config()
 
+# Shared MCP client with a keep-alive connection pool per server URL
+from mcp_client import mcp_client
+from tools_cache import tools_cache
+from plan_executor import plan_executor
+from server_health import health_tracker, CircuitOpenError
+from bulkhead import bulkheads, BulkheadFullError
+from tool_catalog import tool_catalog, ToolDiscoveryError
+from retry_policy import retry_policy
+from llm_client import llm_client, LLMError
+from response_cache import chat_cache
+from summary_jobs import summary_jobs
+from title_worker import title_worker
+from title_backfill import title_backfill, BackfillRunningError, BackfillUnavailableError
+from event_bus import event_bus
+from context_builder import context_builder
+from context_cache import context_cache
+from summarizers import text_parts
+from html_formatter import format_tool_result
+from sse_parser import iter_sse_events, iter_limited_lines, read_jsonrpc_response, matches_request, SSEParseError, ResponseTooLargeError
+
+# Per-server concurrency limits (maxConcurrent/maxQueue/queueTimeout in config.json)
+bulkheads.configure(mcp_config)
+
+# Exceptions raised when an MCP server sheds load before any request is sent
+MCP_REJECTIONS = (BulkheadFullError, CircuitOpenError)
+
+class MCPResponseError(Exception):
+    """Raised when an MCP server answers with an error instead of the requested result"""
+
 # Helper function to get server URL by name
 def get_server_url(server_name):
     servers = mcp_config.get("mcpServers", {})
@@ -124,8 +149,8 @@ def wrap_tools_response(data):
         elif isinstance(data.get("result"), list):
             return {"result": {"tools": data["result"]}}
         elif "error" in data or "parseError" in data:
-            # For errors, create mock tools response to maintain format
-            return {"result": {"tools": []}}
+            # For errors, keep the format but carry the error so callers can tell it from no tools
+            return {"result": {"tools": []}, "error": data.get("error", data.get("parseError"))}
     # Default fallback - create empty tools array
     return {"result": {"tools": []}}
 
@@ -171,6 +196,8 @@ except ImportError as e:
             return {"mode": "chat", "response": "Intent parser not available"}
         def get_enhanced_system_prompt(self, tools_info, prompt, mode):
             return "You are a helpful assistant."
+        def get_tool_system_prompt(self, tools_info, prompt=None):
+            return "You are a helpful assistant."
     intent_parser = FallbackIntentParser()
 
 # Import conversation management with error handling
@@ -189,20 +216,316 @@ except ImportError as e:
             return True
         def get_conversation(self, conversation_id):
             return {"id": conversation_id, "messages": [], "title": "Fallback Chat"}
+        def get_message_count(self, conversation_id):
+            return 0
+        def get_untitled_conversations(self, limit=None):
+            return []
         def get_all_conversations(self):
             return []
         def delete_conversation(self, conversation_id):
             return True
-        def update_conversation_title(self, conversation_id, title):
+        def update_conversation_title(self, conversation_id, title, touch=True):
             return True
+        def attach_summary(self, conversation_id, summary_handle, summary):
+            return 0
     
     class FallbackTitleGenerator:
         def generate_title(self, query, provider="gemini", model=None):
             return query[:30] + "..." if len(query) > 30 else query
+        def generate_titles(self, queries, provider="gemini", model=None):
+            return [self.generate_title(query, provider, model) for query in queries]
     
     conversation_manager = FallbackConversationManager()
     title_generator = FallbackTitleGenerator()
 
+def wrap_rejection_response(action, err):
+    """Wrap a fast load-shedding rejection in the envelope the action's callers expect"""
+    if action == "listTools":
+        return wrap_tools_response({"error": str(err)})
+    elif action == "callTool":
+        return wrap_tool_call_response({"error": str(err)})
+    return {"error": str(err)}
+
+# Build a JSON-RPC payload for a listTools/callTool action, with an id from the server's session
+def build_mcp_payload(url, action, tool_name=None, args=None, headers=None):
+    if action == "listTools":
+        method, params = "tools/list", {}
+    elif action == "callTool":
+        method, params = "tools/call", {"name": tool_name, "arguments": args or {}}
+    else:
+        return None
+    
+    payload = {
+        "jsonrpc": "2.0",
+        "id": mcp_client.session(url, headers).next_id(),
+        "method": method,
+        "params": params
+    }
+    return payload
+
+# Handle server-initiated MCP notifications seen in responses
+def handle_mcp_notification(url, message):
+    if isinstance(message, dict) and message.get("method") == "notifications/tools/list_changed":
+        print(f"🔔 Tool list changed on {url}, invalidating cached tools")
+        tools_cache.invalidate(url)
+
+def parse_mcp_response(url, response, action, request_id=None, convert=True):
+    """Parse an MCP HTTP response into a wrapped result, converting tool output to text once.
+
+    With convert=False, tool output is left as returned so the caller can convert it later.
+    """
+    try:
+        # Reads incrementally and stops at the frame answering request_id
+        data = read_jsonrpc_response(
+            response,
+            request_id,
+            on_notification=lambda message: handle_mcp_notification(url, message)
+        )
+        print("⬅️ Received from MCP:", json.dumps(data)[:500])
+        
+        # Debug tools parsing specifically
+        if action == "listTools" and isinstance(data, dict):
+            tools = data.get("result", {}).get("tools") if isinstance(data.get("result"), dict) else None
+            if tools:
+                print("🔧 Found tools:", len(tools))
+                for idx, tool in enumerate(tools):
+                    print(f"  Tool {idx + 1}: {tool.get('name')} - {tool.get('description')}")
+            else:
+                print("❌ No tools found in result. Full response structure:", list(data.keys()))
+                
+    except SSEParseError as parse_error:
+        print("❌ Parse Error:", str(parse_error))
+        data = {"raw": parse_error.raw, "parseError": str(parse_error)}
+    except ResponseTooLargeError as size_error:
+        print("❌", str(size_error))
+        data = {"error": str(size_error)}
+    finally:
+        response.close()
+    
+    if not response.ok and isinstance(data, dict) and "error" not in data:
+        data = {**data, "error": f"MCP server returned {response.status_code} {response.reason}"}
+    
+    # Always ensure proper wrapping for ALL responses
+    if action == "listTools":
+        data = wrap_tools_response(data)
+    elif action == "callTool":
+        data = wrap_tool_call_response(data)
+        if convert:
+            convert_tool_output(data)
+    
+    return data
+
+def convert_tool_output(data):
+    """Convert a wrapped callTool result's JSON output to readable text in place"""
+    if "result" in data and "output" in data["result"] and isinstance(data["result"]["output"], (dict, list)):
+        data["result"]["output"] = converter.convert(data["result"]["output"])
+    return data
+
+def is_idempotent_request(url, payload):
+    """tools/list, and tools/call on tools the server annotates readOnlyHint, are safe to repeat"""
+    method = payload.get("method") if isinstance(payload, dict) else None
+    if method == "tools/list":
+        return True
+    if method == "tools/call" and "id" in payload:
+        tool_name = (payload.get("params") or {}).get("name")
+        # Only annotations already in the tools cache count; unknown tools are never retried
+        for tool in tools_cache.peek(url) or []:
+            if tool.get("name") == tool_name:
+                return bool((tool.get("annotations") or {}).get("readOnlyHint"))
+    return False
+
+def execute_mcp_action(url, action, payload, headers=None, timeout=60, convert=True):
+    """Send an MCP request in-process and return the wrapped response data.
+
+    Idempotent requests are hedged and retried with jittered backoff; everything else,
+    including tools/call on tools not marked read-only, is sent exactly once. Only the MCP
+    round trip is hedged; tool output is converted once, after the winning attempt.
+    """
+    if not is_idempotent_request(url, payload):
+        return send_mcp_action(url, action, payload, headers, timeout, convert=convert)
+    
+    mcp_session = mcp_client.session(url, headers)
+    
+    def attempt():
+        # Each attempt needs its own JSON-RPC id within the session
+        return send_mcp_action(url, action, {**payload, "id": mcp_session.next_id()}, headers, timeout,
+                               raise_server_errors=True, convert=False)
+    
+    p95 = health_tracker.get(url).percentile(95, payload.get("method"))
+    data = retry_policy.run(attempt, retry_policy.hedge_after(p95))
+    if convert and action == "callTool":
+        convert_tool_output(data)
+    return data
+
+def send_mcp_action(url, action, payload, headers=None, timeout=60, raise_server_errors=False, convert=True):
+    """Send one MCP request over the server's session and return the wrapped response data"""
+    mcp_session = mcp_client.session(url, headers)
+    request_id = payload.get("id") if isinstance(payload, dict) else None
+    succeeded = False
+    token = None  # only set once post() has registered the request
+    try:
+        response, token = mcp_session.post(payload, headers=headers, stream=True, timeout=timeout)
+        print("📊 Response Status:", response.status_code, response.reason)
+        if raise_server_errors and response.status_code >= 500:
+            response.close()
+            raise requests.HTTPError(f"MCP server returned {response.status_code} {response.reason}", response=response)
+        data = parse_mcp_response(url, response, action, request_id, convert)
+        succeeded = True
+        return data
+    finally:
+        mcp_session.complete(token, succeeded)
+
+def defer_summary(compute, conversation_id=None):
+    """Queue an LLM summary on the background pool, attaching it to the conversation when ready"""
+    on_done = None
+    if conversation_id:
+        def on_done(handle, summary):
+            conversation_manager.attach_summary(conversation_id, handle, summary)
+            event_bus.publish({"type": "summary", "conversation_id": conversation_id, "handle": handle, "summary": summary})
+    return summary_jobs.submit(compute, on_done)
+
+def render_locally(output):
+    """Return (text, final) for tool output without waiting on the LLM.
+
+    final is True for a local summarizer or cache hit, False for the raw text content
+    or a plain key/value rendering that should be replaced by an LLM summary later.
+    """
+    if hasattr(converter, "convert_local"):
+        summary = converter.convert_local(output)
+        if summary is not None:
+            return summary, True
+    parts = text_parts(output)
+    return ("\n".join(parts) if parts else format_tool_result(output)), False
+
+def render_deferred(output, conversation_id=None):
+    """Return (text, summary handle) for tool output; the handle is None if text is final"""
+    if not isinstance(output, (dict, list)):
+        return output, None
+    text, final = render_locally(output)
+    if final:
+        return text, None
+    return text, defer_summary(lambda: converter.convert(output), conversation_id)
+
+def defer_tool_output(data, conversation_id=None):
+    """Swap a wrapped callTool result's raw output for its deferred rendering; returns the handle"""
+    result = data.get("result") if isinstance(data, dict) else None
+    if not isinstance(result, dict) or "output" not in result:
+        return None
+    result["output"], handle = render_deferred(result["output"], conversation_id)
+    if handle:
+        result["summaryHandle"] = handle
+    return handle
+
+def fetch_tools(url, timeout=10):
+    """List tools from an MCP server, bypassing the tools cache; raises MCPResponseError on an error reply"""
+    tools_data = execute_mcp_action(url, "listTools", build_mcp_payload(url, "listTools"), timeout=timeout)
+    if tools_data.get("error"):
+        raise MCPResponseError(f"tools/list failed on {url}: {tools_data['error']}")
+    return tools_data.get("result", {}).get("tools", [])
+
+# serverName that asks for the merged tool catalog of every configured server
+ALL_SERVERS = "*"
+
+def list_all_tools():
+    """Discover tools on every configured MCP server concurrently, named server__tool.
+
+    Returns (tools, per-server errors); raises ToolDiscoveryError if no server had any tools.
+    """
+    servers = {name: server["url"] for name, server in mcp_config.get("mcpServers", {}).items() if server.get("url")}
+    return tool_catalog.discover(servers, lambda url: tools_cache.get(url, lambda: fetch_tools(url)))
+
+def route_plan_action(action, default_url):
+    """Return (server url, tool name) for a plan action; namespaced tools go to their own server"""
+    tool = action.get("tool")
+    servers = mcp_config.get("mcpServers", {})
+    split = tool_catalog.split_name(tool, servers)
+    if split:
+        return servers[split[0]]["url"], split[1]
+    return default_url, tool
+
+# Counters for /proxy/stream lifecycles, including streams cancelled by client disconnects
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 5))
+# How long a stream stays open after the result waiting for deferred summaries
+SUMMARY_STREAM_WAIT = float(os.getenv("SUMMARY_STREAM_WAIT", 90))
+stream_stats = {"started": 0, "completed": 0, "cancelled": 0}
+stream_stats_lock = threading.Lock()
+
+def record_stream_event(event):
+    with stream_stats_lock:
+        stream_stats[event] += 1
+
+def relay_with_heartbeat(produce, state):
+    """Relay chunks from produce() run on a worker thread, writing SSE comments while idle.
+
+    Writing the heartbeat surfaces a closed client connection as GeneratorExit even while
+    the upstream MCP server is silent, so the caller can cancel the upstream request.
+    """
+    chunks = queue.Queue()
+    
+    def pump():
+        try:
+            for chunk in produce():
+                if state["cancelled"]:
+                    break
+                chunks.put(chunk)
+        except Exception as err:
+            print("Stream relay error:", err)
+        finally:
+            chunks.put(None)
+    
+    threading.Thread(target=pump, daemon=True).start()
+    
+    while True:
+        try:
+            chunk = chunks.get(timeout=STREAM_HEARTBEAT_SECONDS)
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        if chunk is None:
+            return
+        yield chunk
+
+def summary_events(handles, state):
+    """Yield a summary event for each deferred summary as it finishes, up to SUMMARY_STREAM_WAIT"""
+    deadline = time.time() + SUMMARY_STREAM_WAIT
+    for handle in handles:
+        job = summary_jobs.get(handle)
+        while job and job["status"] == "pending" and not state["cancelled"] and time.time() < deadline:
+            job = summary_jobs.get(handle, wait=STREAM_HEARTBEAT_SECONDS)
+        if state["cancelled"]:
+            return
+        if job:
+            yield f"data: {json.dumps({'type': 'summary', **job})}\n\n"
+
+def cancel_mcp_stream(mcp_session, state, request_id):
+    """Close the upstream response of an abandoned stream and tell the server to stop"""
+    state["cancelled"] = True
+    record_stream_event("cancelled")
+    print(f"✂️ Client disconnected, cancelling MCP request {request_id} on {mcp_session.url}")
+    
+    def cancel():
+        response = state.get("response")
+        if response is not None:
+            response.close()
+        if request_id is None:
+            return
+        try:
+            mcp_session.client.post(
+                mcp_session.url,
+                {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/cancelled",
+                    "params": {"requestId": request_id, "reason": "Client disconnected"}
+                },
+                headers={**mcp_session.session_headers(), **mcp_session.headers},
+                timeout=5
+            ).close()
+        except Exception as e:
+            print(f"⚠️ Failed to send cancellation to MCP server: {e}")
+    
+    # Run off the request thread; the client is already gone
+    threading.Thread(target=cancel, daemon=True).start()
+
 @app.after_request
 def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
@@ -216,7 +539,6 @@ def proxy_stream():
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"})
     
-    global rpc_counter
     data = request.get_json()
     
     if not data:
@@ -248,50 +570,35 @@ def proxy_stream():
     args = data.get("args", {})
     headers = data.get("headers", {})
     raw_payload = data.get("rawPayload")
+    # Send raw/local output now and the LLM summary as a follow-up "summary" event
+    defer = action == "callTool" and bool(data.get("deferSummary"))
+    conversation_id = data.get("conversation_id")
     
     # Build payload
     payload = raw_payload
     if not payload:
-        if action == "listTools":
-            payload = {
-                "jsonrpc": "2.0",
-                "id": str(rpc_counter),
-                "method": "tools/list",
-                "params": {}
-            }
-            rpc_counter += 1
-        elif action == "callTool":
-            if not tool_name:
-                return jsonify({"error": "Missing toolName for callTool"}), 400
-            payload = {
-                "jsonrpc": "2.0",
-                "id": str(rpc_counter),
-                "method": "tools/call",
-                "params": {"name": tool_name, "arguments": args}
-            }
-            rpc_counter += 1
-        else:
+        if action == "callTool" and not tool_name:
+            return jsonify({"error": "Missing toolName for callTool"}), 400
+        payload = build_mcp_payload(url, action, tool_name, args, headers)
+        if not payload:
             return jsonify({"error": "Invalid action or payload"}), 400
     
     print("➡️ Sent to MCP:", json.dumps(payload, indent=2))
+    request_id = payload.get("id") if isinstance(payload, dict) else None
+    mcp_session = mcp_client.session(url, headers)
     
-    def generate():
-        # Send initial status
-        yield f"data: {json.dumps({'type': 'status', 'message': 'Sending request to MCP server...', 'payload': payload})}\n\n"
-        
+    state = {"response": None, "token": None, "cancelled": False}
+    
+    def upstream_events():
+        response = None
+        succeeded = False
+        handles = []
         try:
             # Make request to MCP server
-            response = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json, text/event-stream",
-                    **headers
-                },
-                json=payload,
-                stream=True,
-                timeout=60
-            )
+            response, state["token"] = mcp_session.post(payload, headers=headers, stream=True, timeout=60)
+            state["response"] = response
+            if state["cancelled"]:
+                return
             
             content_type = response.headers.get('content-type', '')
             
@@ -299,73 +606,83 @@ def proxy_stream():
                 # Handle SSE response from MCP server
                 yield f"data: {json.dumps({'type': 'status', 'message': 'Processing SSE response...'})}\n\n"
                 
-                # Process SSE lines
-                for line in response.iter_lines(decode_unicode=True):
-                    if line and line.startswith('data: '):
-                        event_data = line[6:].strip()
-                        if event_data:
-                            try:
-                                parsed = json.loads(event_data)
-                                # Convert JSON to readable format
-                                if action == "callTool" and "result" in parsed and "output" in parsed["result"]:
-                                    readable_output = converter.convert(parsed["result"]["output"])
-                                    parsed["result"]["output"] = readable_output
-                                
-                                # Wrap in Cursor-compatible envelope
-                                cursor_chunk = {'type': 'chunk', 'data': parsed}
-                                yield f"data: {json.dumps(cursor_chunk)}\n\n"
-                            except json.JSONDecodeError:
-                                cursor_chunk = {'type': 'chunk', 'data': {'raw': event_data}}
-                                yield f"data: {json.dumps(cursor_chunk)}\n\n"
+                # Process SSE frames incrementally, stopping once the response frame arrives
+                for event in iter_sse_events(iter_limited_lines(response)):
+                    event_data = event["data"].strip()
+                    try:
+                        parsed = json.loads(event_data)
+                    except json.JSONDecodeError:
+                        cursor_chunk = {'type': 'chunk', 'data': {'raw': event_data}}
+                        yield f"data: {json.dumps(cursor_chunk)}\n\n"
+                        continue
+                    
+                    handle_mcp_notification(url, parsed)
+                    # Convert JSON to readable format
+                    if action == "callTool" and isinstance(parsed, dict) and isinstance(parsed.get("result"), dict) and "output" in parsed["result"]:
+                        if defer:
+                            handle = defer_tool_output(parsed, conversation_id)
+                            if handle:
+                                handles.append(handle)
+                        else:
+                            readable_output = converter.convert(parsed["result"]["output"])
+                            parsed["result"]["output"] = readable_output
+                    
+                    # Wrap in Cursor-compatible envelope
+                    cursor_chunk = {'type': 'chunk', 'data': parsed}
+                    yield f"data: {json.dumps(cursor_chunk)}\n\n"
+                    
+                    if matches_request(parsed, request_id):
+                        break
                 
+                succeeded = True
                 yield f"data: {json.dumps({'type': 'status', 'message': 'Response complete'})}\n\n"
             else:
                 # Handle regular JSON response
-                text = response.text
-                print("⬅️ Received from MCP:", text)
-                
-                data = {}
-                try:
-                    # Check if response is SSE format
-                    if text.startswith('event:') or 'data:' in text:
-                        print("🔄 Detected SSE format, parsing...")
-                        lines = text.split('\n')
-                        json_data = None
-                        
-                        for line in lines:
-                            if line.startswith('data: '):
-                                event_data = line[6:].strip()
-                                if event_data:
-                                    try:
-                                        json_data = json.loads(event_data)
-                                        break
-                                    except json.JSONDecodeError:
-                                        print("⚠️ Failed to parse SSE data line:", event_data)
-                        
-                        data = json_data or {"raw": text, "error": "Could not parse SSE data"}
-                    else:
-                        # Regular JSON parsing
-                        data = response.json()
-                        
-                        # Apply proper wrapping based on action
-                        if action == "listTools":
-                            data = wrap_tools_response(data)
-                        elif action == "callTool":
-                            data = wrap_tool_call_response(data)
-                            
-                            # Convert JSON output to readable format
-                            if "result" in data and "output" in data["result"]:
-                                data["result"]["output"] = converter.convert(data["result"]["output"])
-                        
-                except json.JSONDecodeError:
-                    data = {"raw": text}
+                data = parse_mcp_response(url, response, action, request_id, convert=not defer)
+                succeeded = True
+                if defer:
+                    handle = defer_tool_output(data, conversation_id)
+                    if handle:
+                        handles.append(handle)
                 
                 yield f"data: {json.dumps({'type': 'complete', 'data': data})}\n\n"
                 yield f"data: {json.dumps({'type': 'status', 'message': 'Response complete'})}\n\n"
                 
+        except MCP_REJECTIONS as err:
+            print("MCP request rejected:", err)
+            yield f"data: {json.dumps({'type': 'complete', 'data': wrap_rejection_response(action, err)})}\n\n"
+            yield f"data: {json.dumps({'type': 'status', 'message': 'Response complete'})}\n\n"
         except Exception as err:
+            if state["cancelled"]:
+                return
             print("Proxy error:", err)
             yield f"data: {json.dumps({'type': 'error', 'error': 'Failed to reach MCP server', 'details': str(err)})}\n\n"
+        finally:
+            # Release the connection back to the server's pool
+            if response is not None:
+                response.close()
+            # A client cancellation says nothing about the server's health
+            mcp_session.complete(state["token"], None if state["cancelled"] else succeeded)
+        
+        # The MCP request is settled; keep the stream open for any deferred summaries
+        yield from summary_events(handles, state)
+    
+    def generate():
+        # Send initial status
+        yield f"data: {json.dumps({'type': 'status', 'message': 'Sending request to MCP server...', 'payload': payload})}\n\n"
+        
+        record_stream_event("started")
+        finished = False
+        try:
+            # Upstream is read on a worker so this generator can keep writing to the client
+            for chunk in relay_with_heartbeat(upstream_events, state):
+                yield chunk
+            finished = True
+            record_stream_event("completed")
+        finally:
+            # GeneratorExit here means the client went away mid-stream
+            if not finished:
+                cancel_mcp_stream(mcp_session, state, request_id)
     
     return Response(stream_with_context(generate()), mimetype='text/event-stream',
                    headers={'Cache-Control': 'no-cache', 'Connection': 'keep-alive',
@@ -377,7 +694,6 @@ def proxy():
     if request.method == "OPTIONS":
         return jsonify({"status": "ok"})
     
-    global rpc_counter
     data = request.get_json()
     
     if not data:
@@ -409,116 +725,165 @@ def proxy():
     args = data.get("args", {})
     headers = data.get("headers", {})
     raw_payload = data.get("rawPayload")
+    defer = action == "callTool" and bool(data.get("deferSummary"))
+    conversation_id = data.get("conversation_id")
     
     # Build payload
     payload = raw_payload
     if not payload:
-        if action == "listTools":
-            payload = {
-                "jsonrpc": "2.0",
-                "id": str(rpc_counter),
-                "method": "tools/list",
-                "params": {}
-            }
-            rpc_counter += 1
-        elif action == "callTool":
-            if not tool_name:
-                return jsonify({"error": "Missing toolName for callTool"}), 400
-            payload = {
-                "jsonrpc": "2.0",
-                "id": str(rpc_counter),
-                "method": "tools/call",
-                "params": {"name": tool_name, "arguments": args}
-            }
-            rpc_counter += 1
-        else:
+        if action == "callTool" and not tool_name:
+            return jsonify({"error": "Missing toolName for callTool"}), 400
+        payload = build_mcp_payload(url, action, tool_name, args, headers)
+        if not payload:
             return jsonify({"error": "Invalid action or payload"}), 400
     
     print("➡️ Sent to MCP:", json.dumps(payload, indent=2))
     
     try:
-        response = requests.post(
-            url,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream",
-                **headers
-            },
-            json=payload,
-            timeout=60
-        )
-        
-        print("📊 Response Status:", response.status_code, response.reason)
-        print("📋 Response Headers:", dict(response.headers))
-        
-        text = response.text
-        print("⬅️ Received Raw from MCP:", text)
-        
-        data = {}
-        try:
-            # Check if response is SSE format
-            if text.startswith('event:') or 'data:' in text:
-                print("🔄 Detected SSE format, parsing...")
-                lines = text.split('\n')
-                json_data = None
-                
-                for line in lines:
-                    if line.startswith('data: '):
-                        event_data = line[6:].strip()
-                        if event_data:
-                            try:
-                                json_data = json.loads(event_data)
-                                break
-                            except json.JSONDecodeError:
-                                print("⚠️ Failed to parse SSE data line:", event_data)
-                
-                data = json_data or {"raw": text, "error": "Could not parse SSE data"}
-            else:
-                # Regular JSON parsing
-                data = response.json()
-                
-                # Apply proper wrapping based on action
-                if action == "listTools":
-                    data = wrap_tools_response(data)
-                elif action == "callTool":
-                    data = wrap_tool_call_response(data)
-                    
-                    # Convert JSON output to readable format
-                    if "result" in data and "output" in data["result"]:
-                        data["result"]["output"] = converter.convert(data["result"]["output"])
-                
-                print("✅ Parsed JSON:", json.dumps(data, indent=2))
-                
-                # Debug tools parsing specifically
-                if data.get("result") and data["result"].get("tools"):
-                    print("🔧 Found tools:", len(data["result"]["tools"]))
-                    for idx, tool in enumerate(data["result"]["tools"]):
-                        print(f"  Tool {idx + 1}: {tool.get('name')} - {tool.get('description')}")
-                else:
-                    print("❌ No tools found in result. Full response structure:", list(data.keys()))
-                    if data.get("result"):
-                        print("📝 Result keys:", list(data["result"].keys()))
-                        
-        except json.JSONDecodeError as parse_error:
-            print("❌ JSON Parse Error:", str(parse_error))
-            data = {"raw": text, "parseError": str(parse_error)}
-        
-        # Always ensure proper wrapping for ALL responses
-        if action == "listTools":
-            data = wrap_tools_response(data)
-        elif action == "callTool":
-            data = wrap_tool_call_response(data)
-            
-            # Convert JSON output to readable format if not already done
-            if "result" in data and "output" in data["result"] and isinstance(data["result"]["output"], (dict, list)):
-                data["result"]["output"] = converter.convert(data["result"]["output"])
-        
+        data = execute_mcp_action(url, action, payload, headers=headers, convert=not defer)
+        if defer:
+            # The LLM summary is fetched later from /proxy/summary/<handle>
+            defer_tool_output(data, conversation_id)
         return jsonify(data)
         
+    except MCP_REJECTIONS as err:
+        print("MCP request rejected:", err)
+        return jsonify(wrap_rejection_response(action, err))
     except Exception as err:
         print("Proxy error:", err)
         return jsonify({"error": "Failed to reach MCP server", "details": str(err)}), 500
 
+def load_conversation_history(conversation_id, prompt=None, provider="gemini"):
+    """Return a conversation's history as {"role", "content"} dicts within the model's token budget.
+
+    Messages too old for the budget are represented by the conversation's rolling summary.
+    """
+    conversation_history = []
+    if conversation_id:
+        try:
+            conversation = conversation_manager.get_conversation(conversation_id)
+            conversation_history = context_builder.build(
+                conversation,
+                prompt,
+                provider,
+                store_summary=getattr(conversation_manager, "update_context_summary", None)
+            )
+        except Exception as e:
+            print(f"Failed to get conversation history: {e}")
+    return conversation_history
+
+def build_tools_info(tools):
+    """Describe MCP tools the way the tool-mode system prompt expects"""
+    tools_info = []
+    for tool in tools:
+        tool_info = {
+            "name": tool.get("name"),
+            "description": tool.get("description"),
+            "parameters": tool.get("inputSchema", {}).get("properties", {}),
+            "required": tool.get("inputSchema", {}).get("required", [])
+        }
+        tools_info.append(tool_info)
+    return tools_info
+
+def build_gemini_contents(system_prompt, conversation_history, prompt):
+    """Build Gemini contents: system prompt, conversation history, then the current message"""
+    return build_gemini_prefix(system_prompt) + build_gemini_turns(conversation_history, prompt)
+
+def build_gemini_prefix(system_prompt):
+    """The system prompt and priming reply that open every Gemini conversation"""
+    return [
+        {
+            "parts": [{"text": system_prompt}],
+            "role": "user"
+        },
+        {
+            "parts": [{"text": "I understand. I'll help you with your questions and remember our conversation context."}],
+            "role": "model"
+        }
+    ]
+
+def build_gemini_turns(conversation_history, prompt):
+    """Conversation history followed by the current user message"""
+    contents = []
+    
+    # Add conversation history
+    if conversation_history:
+        for msg in conversation_history:
+            role = "user" if msg["role"] == "user" else "model"
+            contents.append({
+                "parts": [{"text": msg["content"]}],
+                "role": role
+            })
+    
+    # Add current user message
+    contents.append({
+        "parts": [{"text": prompt}],
+        "role": "user"
+    })
+    return contents
+
+def parse_ai_plan(response_text):
+    """Extract the JSON plan from a tool-mode LLM response, falling back to the raw text"""
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError:
+        # Try to extract JSON from the response if it's not pure JSON
+        json_match = re.search(r'\{[\s\S]*\}', response_text)
+        if json_match:
+            try:
+                return json.loads(json_match.group())
+            except json.JSONDecodeError as parse_error:
+                print("Failed to parse JSON, using fallback structure:", parse_error)
+                print("Raw response:", response_text)
+                # Create fallback structure from raw text
+                return {
+                    "plan": response_text.strip(),
+                    "actions": [],
+                    "confidence": 75
+                }
+        print("No JSON found, creating fallback structure from response:", response_text)
+        # Create fallback structure from raw text
+        return {
+            "plan": response_text.strip() if response_text.strip() else "AI generated plan",
+            "actions": [],
+            "confidence": 70
+        }
+
+def generate_title_if_new(conversation_id, prompt, provider):
+    """Queue a background title for conversations that have only just started.
+
+    The title is stored and published as a "title" event on /conversations/events when
+    ready, so the reply never waits on it.
+    """
+    try:
+        message_count = conversation_manager.get_message_count(conversation_id)
+        if message_count is None or message_count > 2:
+            return
+        
+        def store_title(title):
+            conversation_manager.update_conversation_title(conversation_id, title)
+            event_bus.publish({"type": "title", "conversation_id": conversation_id, "title": title})
+            print(f"Generated title for conversation {conversation_id}: {title}")
+        
+        title_worker.enqueue(conversation_id, lambda: title_generator.generate_title(prompt, provider), store_title)
+    except Exception as title_error:
+        print(f"Failed to queue title generation: {title_error}")
+
+# Chat-mode and tool-mode generation settings, shared by /proxy/ai and /proxy/ai/stream
+CHAT_GENERATION_CONFIG = {"temperature": 0.7, "maxOutputTokens": 1000}
+TOOL_GENERATION_CONFIG = {"temperature": 0.7, "maxOutputTokens": 2000, "response_mime_type": "application/json"}
+
+def chat_cache_key(system_prompt, conversation_history, prompt):
+    """Exact-match cache key for a Gemini chat reply"""
+    return chat_cache.make_key("gemini", llm_client.model_for("gemini"), system_prompt, conversation_history or [], prompt)
+
+def modal_chat_reply(prompt, use_cache=True):
+    """Return (reply, cached) from the Modal endpoint, served from the chat cache when possible"""
+    if not use_cache:
+        return llm_client.modal_generate(prompt), False
+    key = chat_cache.make_key("groq", llm_client.modal_url, prompt)
+    return chat_cache.get_or_set(key, lambda: llm_client.modal_generate(prompt))
+
 # AI endpoint for processing prompts - UPDATED: OpenAI and Claude redirect to Gemini, Groq uses Modal endpoint
 @app.route("/proxy/ai", methods=["POST", "OPTIONS"])
 def proxy_ai():
@@ -537,9 +902,11 @@ def proxy_ai():
         mcp_url = data.get("mcpUrl")
         server_name = data.get("serverName")
         conversation_id = data.get("conversation_id")
+        all_servers = data.get("allServers") or server_name == ALL_SERVERS
+        use_cache = not data.get("bypassCache")
         
         # Support serverName routing
-        if not mcp_url and server_name:
+        if not mcp_url and server_name and not all_servers:
             mcp_url = get_server_url(server_name)
             if not mcp_url:
                 return jsonify({"error": f"Server '{server_name}' not found in configuration"}), 400
@@ -566,52 +933,33 @@ def proxy_ai():
             print("🔄 Using Groq provider - routing to Modal endpoint")
             
             try:
-                # Call your Modal endpoint directly
-                modal_response = requests.post(
-                    MODAL_ENDPOINT,
-                    headers={"Content-Type": "application/json"},
-                    json={"prompt": prompt},
-                    timeout=60
+                # Call your Modal endpoint over the shared LLM client
+                response_text, cached = modal_chat_reply(prompt, use_cache)
+                
+                # Return in the expected format
+                cursor_response = {
+                    "mode": "chat",
+                    "response": response_text,
+                    "plan": "Tensora AI response",
+                    "actions": [],
+                    "confidence": 100,
+                    "cached": cached,
+                    "conversation_id": conversation_id
+                }
+                
+                # Save assistant response to conversation
+                conversation_manager.add_message(
+                    conversation_id,
+                    "assistant",
+                    response_text,
+                    "chat",
+                    {"mode": "chat", "provider": "groq", "confidence": 100}
                 )
                 
-                if modal_response.status_code == 200:
-                    modal_data = modal_response.json()
-                    response_text = modal_data.get("response", "No response from Modal endpoint")
-                    
-                    # Return in the expected format
-                    cursor_response = {
-                        "mode": "chat",
-                        "response": response_text,
-                        "plan": "Tensora AI response",
-                        "actions": [],
-                        "confidence": 100,
-                        "conversation_id": conversation_id
-                    }
-                    
-                    # Save assistant response to conversation
-                    conversation_manager.add_message(
-                        conversation_id,
-                        "assistant",
-                        response_text,
-                        "chat",
-                        {"mode": "chat", "provider": "groq", "confidence": 100}
-                    )
-                    
-                    # Generate and update title for new conversations
-                    try:
-                        conversation = conversation_manager.get_conversation(conversation_id)
-                        if conversation and conversation.get("message_count", 0) <= 2:
-                            title = title_generator.generate_title(prompt, "groq")
-                            conversation_manager.update_conversation_title(conversation_id, title)
-                            print(f"Generated title for conversation {conversation_id}: {title}")
-                    except Exception as title_error:
-                        print(f"Failed to generate title: {title_error}")
-                    
-                    return jsonify(cursor_response)
-                else:
-                    error_msg = f"Modal endpoint error: {modal_response.status_code}"
-                    print(error_msg)
-                    return jsonify({"error": error_msg}), 500
+                # Generate and update title for new conversations
+                generate_title_if_new(conversation_id, prompt, "groq")
+                
+                return jsonify(cursor_response)
                     
             except Exception as modal_error:
                 print(f"Modal endpoint call failed: {modal_error}")
@@ -631,52 +979,42 @@ def proxy_ai():
         
         # First, fetch available tools from MCP
         tools = []
-        if mcp_url:
+        tool_errors = {}
+        if all_servers:
+            # Every server is listed concurrently, so this costs as much as the slowest one
+            print("Fetching tools from all MCP servers")
+            try:
+                tools, tool_errors = list_all_tools()
+            except ToolDiscoveryError as discovery_error:
+                print("Tool discovery failed:", str(discovery_error))
+                return jsonify({"error": "No tools could be discovered on any MCP server",
+                                "details": discovery_error.errors, "conversation_id": conversation_id}), 502
+            print("Found tools:", len(tools))
+        elif mcp_url:
             try:
                 print("Fetching tools from MCP server:", mcp_url)
-                tools_response = requests.post(
-                    "http://localhost:4000/proxy",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "url": mcp_url,
-                        "action": "listTools"
-                    },
-                    timeout=10
-                )
-                
-                if tools_response.status_code == 200:
-                    tools_data = tools_response.json()
-                    tools = tools_data.get("result", {}).get("tools", [])
-                    print("Found tools:", len(tools))
-                else:
-                    print(f"Failed to fetch tools: {tools_response.status_code}")
+                tools = tools_cache.get(mcp_url, lambda: fetch_tools(mcp_url))
+                print("Found tools:", len(tools))
+            except MCP_REJECTIONS as tools_error:
+                print("Tools request rejected:", str(tools_error))
+                return jsonify({"error": "MCP server is unavailable", "details": str(tools_error),
+                                "conversation_id": conversation_id}), 503
             except Exception as tools_error:
+                # Planning without the server's tools would only produce a useless plan
                 print("Failed to fetch tools:", str(tools_error))
-                tools = []
+                return jsonify({"error": "Failed to fetch tools from MCP server", "details": str(tools_error),
+                                "conversation_id": conversation_id}), 502
         
         # Analyze intent using the intent parser
         intent = intent_parser.analyze_intent(prompt, tools)
         print("Detected intent:", intent)
         
         # Get conversation history for context
-        conversation_history = []
-        if conversation_id:
-            try:
-                conversation = conversation_manager.get_conversation(conversation_id)
-                if conversation and conversation.get("messages"):
-                    recent_messages = conversation["messages"][-10:]
-                    for msg in recent_messages:
-                        if msg["role"] in ["user", "assistant"]:
-                            conversation_history.append({
-                                "role": msg["role"],
-                                "content": msg["content"]
-                            })
-            except Exception as e:
-                print(f"Failed to get conversation history: {e}")
+        conversation_history = load_conversation_history(conversation_id, prompt)
         
         # Handle chat mode - direct LLM response
         if intent.get("mode") == "chat":
-            response = handle_chat_mode(provider, prompt, {"gemini": gemini_api_key}, conversation_history)
+            response = handle_chat_mode(provider, prompt, {"gemini": gemini_api_key}, conversation_history, use_cache)
             response_data = response.get_json()
             
             # Save assistant response to conversation
@@ -689,14 +1027,7 @@ def proxy_ai():
             )
             
             # Generate and update title for new conversations
-            try:
-                conversation = conversation_manager.get_conversation(conversation_id)
-                if conversation and conversation.get("message_count", 0) <= 2:
-                    title = title_generator.generate_title(prompt, provider)
-                    conversation_manager.update_conversation_title(conversation_id, title)
-                    print(f"Generated title for conversation {conversation_id}: {title}")
-            except Exception as title_error:
-                print(f"Failed to generate title: {title_error}")
+            generate_title_if_new(conversation_id, prompt, provider)
             
             # Add conversation_id to response
             response_data["conversation_id"] = conversation_id
@@ -704,114 +1035,25 @@ def proxy_ai():
         
         # Handle tool mode - existing behavior for other providers
         # Prepare tools information for the AI
-        tools_info = []
-        for tool in tools:
-            tool_info = {
-                "name": tool.get("name"),
-                "description": tool.get("description"),
-                "parameters": tool.get("inputSchema", {}).get("properties", {}),
-                "required": tool.get("inputSchema", {}).get("required", [])
-            }
-            tools_info.append(tool_info)
-        
-        system_prompt = intent_parser.get_enhanced_system_prompt(tools_info, prompt, "tool")
+        tools_info = build_tools_info(tools)
         
-        # Models configuration - groq uses Modal, others use Gemini
-        models = {
-            "openai": "gpt-3.5-turbo",
-            "gemini": "gemini-2.5-flash",
-            "claude": "claude-3-haiku-20240307",
-            "groq": "llama3-8b-8192"  # This is just for reference, not actually used
-        }
+        # The tool prompt leaves the request out so it can be served from the provider's context cache
+        system_prompt = intent_parser.get_tool_system_prompt(tools_info)
         
         # All providers except groq use Gemini
-        endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={gemini_api_key}"
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        # Build conversation contents for Gemini
-        contents = []
-        
-        # Add system prompt as first message
-        contents.append({
-            "parts": [{"text": system_prompt}],
-            "role": "user"
-        })
-        contents.append({
-            "parts": [{"text": "I understand. I'll help you with your questions and remember our conversation context."}],
-            "role": "model"
-        })
-        
-        # Add conversation history
-        if conversation_history:
-            for msg in conversation_history:
-                role = "user" if msg["role"] == "user" else "model"
-                contents.append({
-                    "parts": [{"text": msg["content"]}],
-                    "role": role
-                })
-        
-        # Add current user message
-        contents.append({
-            "parts": [{"text": prompt}],
-            "role": "user"
-        })
-        
-        body = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": 0.7, 
-                "maxOutputTokens": 2000,
-                "response_mime_type": "application/json"
-            }
-        }
-        
         print(f"Sending request to Gemini API (for {provider} provider)")
-        response = requests.post(
-            endpoint,
-            headers=headers,
-            json=body,
-            timeout=60
-        )
-        
-        if not response.ok:
-            error_data = response.json()
-            print(f"Gemini API error:", error_data)
-            return jsonify({"error": f"Gemini API error: {error_data.get('error', {}).get('message', response.reason)}"}), 500
-        
-        response_data = response.json()
-        
-        # Parse response from Gemini
-        response_text = response_data["candidates"][0]["content"]["parts"][0]["text"]
+        try:
+            response_text = context_cache.generate(
+                build_gemini_prefix(system_prompt),
+                build_gemini_turns(conversation_history, prompt),
+                TOOL_GENERATION_CONFIG
+            )
+        except LLMError as llm_error:
+            print("Gemini API error:", llm_error)
+            return jsonify({"error": str(llm_error)}), 500
         
         # Extract JSON from response
-        ai_response = {}
-        try:
-            ai_response = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from the response if it's not pure JSON
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                try:
-                    ai_response = json.loads(json_match.group())
-                except json.JSONDecodeError as parse_error:
-                    print("Failed to parse JSON, using fallback structure:", parse_error)
-                    print("Raw response:", response_text)
-                    # Create fallback structure from raw text
-                    ai_response = {
-                        "plan": response_text.strip(),
-                        "actions": [],
-                        "confidence": 75
-                    }
-            else:
-                print("No JSON found, creating fallback structure from response:", response_text)
-                # Create fallback structure from raw text
-                ai_response = {
-                    "plan": response_text.strip() if response_text.strip() else "AI generated plan",
-                    "actions": [],
-                    "confidence": 70
-                }
+        ai_response = parse_ai_plan(response_text)
         
         # Ensure response follows Cursor format
         cursor_response = {
@@ -821,6 +1063,9 @@ def proxy_ai():
             "mode": "tool",
             "conversation_id": conversation_id
         }
+        if tool_errors:
+            # Servers whose tools were missing from the catalog the plan was made from
+            cursor_response["toolErrors"] = tool_errors
         
         # Save assistant plan to conversation
         conversation_manager.add_message(
@@ -836,14 +1081,7 @@ def proxy_ai():
         )
         
         # Generate and update title for new conversations
-        try:
-            conversation = conversation_manager.get_conversation(conversation_id)
-            if conversation and conversation.get("message_count", 0) <= 2:
-                title = title_generator.generate_title(prompt, provider)
-                conversation_manager.update_conversation_title(conversation_id, title)
-                print(f"Generated title for conversation {conversation_id}: {title}")
-        except Exception as title_error:
-            print(f"Failed to generate title: {title_error}")
+        generate_title_if_new(conversation_id, prompt, provider)
         
         return jsonify(cursor_response)
         
@@ -852,6 +1090,268 @@ def proxy_ai():
         traceback.print_exc()
         return jsonify({"error": str(err)}), 500
 
+# Streaming variant of /proxy/ai - forwards LLM tokens as SSE chunks as they are generated
+@app.route("/proxy/ai/stream", methods=["POST", "OPTIONS"])
+def proxy_ai_stream():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    data = request.get_json()
+    if not data:
+        return jsonify({"error": "No JSON data received"}), 400
+    
+    print(f"Received streaming AI request: {data}")
+    
+    provider = data.get("provider")
+    prompt = data.get("prompt")
+    mcp_url = data.get("mcpUrl")
+    server_name = data.get("serverName")
+    conversation_id = data.get("conversation_id")
+    all_servers = data.get("allServers") or server_name == ALL_SERVERS
+    use_cache = not data.get("bypassCache")
+    
+    # Support serverName routing
+    if not mcp_url and server_name and not all_servers:
+        mcp_url = get_server_url(server_name)
+        if not mcp_url:
+            return jsonify({"error": f"Server '{server_name}' not found in configuration"}), 400
+    
+    if not prompt:
+        return jsonify({"error": "Missing prompt"}), 400
+    
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if provider != "groq" and not gemini_api_key:
+        return jsonify({"error": "API key for Gemini not configured. All providers require Gemini API key."}), 400
+    
+    # Create new conversation if not provided
+    if not conversation_id:
+        conversation_id = conversation_manager.create_conversation()
+        print(f"Created new conversation: {conversation_id}")
+    
+    # Save user message to conversation
+    conversation_manager.add_message(
+        conversation_id,
+        "user",
+        prompt,
+        "text",
+        {"provider": provider, "mcp_url": mcp_url}
+    )
+    
+    state = {"response": None, "cancelled": False}
+    
+    def finish_chat(response_text, message_provider):
+        """Persist a chat reply and return the body /proxy/ai would have returned"""
+        conversation_manager.add_message(
+            conversation_id,
+            "assistant",
+            response_text,
+            "chat",
+            {"mode": "chat", "provider": message_provider, "confidence": 100}
+        )
+        generate_title_if_new(conversation_id, prompt, message_provider)
+        return {
+            "mode": "chat",
+            "response": response_text,
+            "plan": "Conversational response",
+            "actions": [],
+            "confidence": 100,
+            "conversation_id": conversation_id
+        }
+    
+    def finish_plan(response_text):
+        """Persist a tool-mode plan and return the body /proxy/ai would have returned"""
+        ai_response = parse_ai_plan(response_text)
+        conversation_manager.add_message(
+            conversation_id,
+            "assistant",
+            ai_response.get("plan", "AI generated plan"),
+            "plan",
+            {
+                "mode": "tool",
+                "actions": ai_response.get("actions", []),
+                "confidence": ai_response.get("confidence", 85)
+            }
+        )
+        generate_title_if_new(conversation_id, prompt, provider)
+        return {
+            "plan": ai_response.get("plan", "AI generated plan"),
+            "actions": ai_response.get("actions", []),
+            "confidence": ai_response.get("confidence", 85),
+            "mode": "tool",
+            "conversation_id": conversation_id
+        }
+    
+    def produce():
+        try:
+            yield f"data: {json.dumps({'type': 'status', 'message': 'Thinking...', 'conversation_id': conversation_id})}\n\n"
+            
+            if provider == "groq":
+                # The Modal endpoint does not stream, so its reply arrives as one chunk
+                response_text, _ = modal_chat_reply(prompt, use_cache)
+                yield f"data: {json.dumps({'type': 'chunk', 'data': {'text': response_text}})}\n\n"
+                result = finish_chat(response_text, "groq")
+            else:
+                tools = []
+                tool_errors = {}
+                if all_servers:
+                    # ToolDiscoveryError ends the stream with an error event instead of an empty plan
+                    tools, tool_errors = list_all_tools()
+                elif mcp_url:
+                    tools = tools_cache.get(mcp_url, lambda: fetch_tools(mcp_url))
+                
+                intent = intent_parser.analyze_intent(prompt, tools)
+                mode = "chat" if intent.get("mode") == "chat" else "tool"
+                
+                if mode == "chat":
+                    system_prompt = intent_parser.get_enhanced_system_prompt([], prompt, "chat")
+                    generation_config = CHAT_GENERATION_CONFIG
+                else:
+                    # The tool prompt leaves the request out so it can be served from the provider's context cache
+                    system_prompt = intent_parser.get_tool_system_prompt(build_tools_info(tools))
+                    generation_config = TOOL_GENERATION_CONFIG
+                
+                conversation_history = load_conversation_history(conversation_id, prompt)
+                prefix = build_gemini_prefix(system_prompt)
+                turns = build_gemini_turns(conversation_history, prompt)
+                
+                yield f"data: {json.dumps({'type': 'status', 'message': 'Generating response...', 'mode': mode})}\n\n"
+                
+                cache_key = chat_cache_key(system_prompt, conversation_history, prompt) if mode == "chat" and use_cache else None
+                response_text = chat_cache.get(cache_key) if cache_key else None
+                if response_text is not None:
+                    # Cached chat replies are sent whole
+                    yield f"data: {json.dumps({'type': 'chunk', 'data': {'text': response_text}})}\n\n"
+                else:
+                    print(f"Streaming request to Gemini API (for {provider} provider, {mode} mode)")
+                    parts = []
+                    on_response = lambda response: state.__setitem__("response", response)
+                    if mode == "chat":
+                        stream = llm_client.gemini_stream(prefix + turns, generation_config, on_response=on_response)
+                    else:
+                        stream = context_cache.stream(prefix, turns, generation_config, on_response=on_response)
+                    for text in stream:
+                        parts.append(text)
+                        yield f"data: {json.dumps({'type': 'chunk', 'data': {'text': text}})}\n\n"
+                    
+                    if state["cancelled"]:
+                        return
+                    response_text = "".join(parts)
+                    if cache_key:
+                        chat_cache.set(cache_key, response_text)
+                result = finish_chat(response_text, provider) if mode == "chat" else finish_plan(response_text)
+                if mode == "tool" and tool_errors:
+                    result["toolErrors"] = tool_errors
+            
+            # Same body /proxy/ai returns, once the message has been saved
+            yield f"data: {json.dumps({'type': 'complete', 'data': result})}\n\n"
+            yield f"data: {json.dumps({'type': 'status', 'message': 'Response complete'})}\n\n"
+        except Exception as err:
+            if state["cancelled"]:
+                return
+            print("AI streaming error:", str(err))
+            traceback.print_exc()
+            yield f"data: {json.dumps({'type': 'error', 'error': 'AI processing failed', 'details': str(err), 'conversation_id': conversation_id})}\n\n"
+    
+    def generate():
+        finished = False
+        try:
+            for chunk in relay_with_heartbeat(produce, state):
+                yield chunk
+            finished = True
+        finally:
+            # GeneratorExit here means the client went away; stop generating tokens for it
+            if not finished:
+                state["cancelled"] = True
+                response = state.get("response")
+                if response is not None:
+                    threading.Thread(target=response.close, daemon=True).start()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'Connection': 'keep-alive',
+                           'Access-Control-Allow-Origin': '*', 'Access-Control-Allow-Headers': 'Cache-Control'})
+
+def run_plan_action(mcp_url, action, convert=True):
+    """Execute a single plan action against its MCP server (mcp_url unless the tool is namespaced).
+
+    With convert=False the raw tool output is returned for summarize_plan_results.
+    """
+    print("Executing action:", action.get("tool"))
+    mcp_url, tool_name = route_plan_action(action, mcp_url)
+    payload = build_mcp_payload(mcp_url, "callTool", tool_name, action.get("parameters", {}))
+    # Output is wrapped but left raw so failures can be read before it becomes text
+    action_result = execute_mcp_action(mcp_url, "callTool", payload, convert=False)
+    output = action_result.get("result", {}).get("output")
+    error = tool_call_error(action_result)
+    if convert:
+        output = convert_tool_output(action_result)["result"]["output"]
+    
+    return {
+        "action": action.get("tool"),
+        "success": error is None,
+        "result": output,
+        "error": error
+    }
+
+def tool_call_error(data):
+    """Return the error of a wrapped callTool response, or None if the tool succeeded.
+
+    Transport and JSON-RPC errors are wrapped under result.output; tools that fail report
+    isError on their result instead.
+    """
+    if data.get("error"):
+        return data["error"]
+    output = data.get("result", {}).get("output")
+    if isinstance(output, dict):
+        if output.get("error"):
+            return output["error"]
+        if output.get("parseError"):
+            return output["parseError"]
+        if output.get("isError"):
+            parts = text_parts(output)
+            return "\n".join(parts) if parts else "Tool reported an error"
+    return None
+
+def convert_outputs(outputs):
+    """Convert several tool outputs to readable text, in one LLM request where possible"""
+    if hasattr(converter, "convert_batch"):
+        return converter.convert_batch(outputs)
+    return [converter.convert(output) for output in outputs]
+
+def summarize_plan_results(results):
+    """Convert the raw outputs of a finished plan to readable text"""
+    pending = [result for result in results if isinstance(result.get("result"), (dict, list))]
+    if not pending:
+        return results
+    
+    for result, summary in zip(pending, convert_outputs([result["result"] for result in pending])):
+        result["result"] = summary
+    return results
+
+def defer_plan_results(results, conversation_id=None):
+    """Render a finished plan's outputs now and summarize the rest in one background batch.
+
+    Returns the summary handle, or None if every output was answered locally. The job's
+    summary is a list aligned with results, None where no summary was needed.
+    """
+    pending = []  # (index in results, raw output)
+    for index, result in enumerate(results):
+        output = result.get("result")
+        if not isinstance(output, (dict, list)):
+            continue
+        result["result"], final = render_locally(output)
+        if not final:
+            pending.append((index, output))
+    if not pending:
+        return None
+    
+    def summarize():
+        summaries = [None] * len(results)
+        for (index, _), summary in zip(pending, convert_outputs([output for _, output in pending])):
+            summaries[index] = summary
+        return summaries
+    
+    return defer_summary(summarize, conversation_id)
+
 # Execute AI plan endpoint
 @app.route("/proxy/ai/execute", methods=["POST", "OPTIONS"])
 def proxy_ai_execute():
@@ -866,9 +1366,12 @@ def proxy_ai_execute():
     actions = data.get("actions")
     mcp_url = data.get("mcpUrl")
     server_name = data.get("serverName")
+    # Return locally rendered results now and the batched LLM summary via /proxy/summary/<handle>
+    defer = bool(data.get("deferSummary"))
+    conversation_id = data.get("conversation_id")
     
     # Support serverName routing
-    if not mcp_url and server_name:
+    if not mcp_url and server_name and server_name != ALL_SERVERS:
         mcp_url = get_server_url(server_name)
         if not mcp_url:
             return jsonify({"error": f"Server '{server_name}' not found in configuration"}), 400
@@ -876,54 +1379,37 @@ def proxy_ai_execute():
     if not actions or not isinstance(actions, list):
         return jsonify({"error": "Invalid actions"}), 400
     
+    # Namespaced tools from the merged catalog carry their own server
+    if not mcp_url and not all(isinstance(action, dict) and route_plan_action(action, None)[0] for action in actions):
+        return jsonify({"error": "Missing MCP webhook URL or serverName"}), 400
+    
     try:
-        results = []
-        for action in actions:
-            try:
-                print("Executing action:", action.get("tool"))
-                action_response = requests.post(
-                    "http://localhost:4000/proxy",
-                    headers={"Content-Type": "application/json"},
-                    json={
-                        "url": mcp_url,
-                        "action": "callTool",
-                        "toolName": action.get("tool"),
-                        "args": action.get("parameters", {})
-                    },
-                    timeout=60
-                )
-                
-                action_result = action_response.json()
-                # Ensure proper wrapping for tool call results
-                wrapped_result = wrap_tool_call_response(action_result)
-                
-                # Convert JSON output to readable format
-                if "result" in wrapped_result and "output" in wrapped_result["result"]:
-                    wrapped_result["result"]["output"] = converter.convert(wrapped_result["result"]["output"])
-                
-                results.append({
-                    "action": action.get("tool"),
-                    "success": "error" not in action_result,
-                    "result": wrapped_result.get("result", {}).get("output"),
-                    "error": action_result.get("error")
-                })
-                
-                # Add a small delay between actions
-                time.sleep(0.5)
-                
-            except Exception as action_error:
-                print("Error executing action:", action_error)
-                results.append({
-                    "action": action.get("tool"),
-                    "success": False,
-                    "error": str(action_error)
-                })
+        plan_executor.resolve_dependencies(actions)
+    except ValueError as dependency_error:
+        return jsonify({"error": "Invalid action dependencies", "details": str(dependency_error)}), 400
+    
+    try:
+        # Independent actions run concurrently; results come back in plan order.
+        # Outputs are summarized together once the whole plan has finished.
+        results = plan_executor.execute(
+            actions,
+            lambda action: run_plan_action(mcp_url, action, convert=False),
+            server_for=lambda action: route_plan_action(action, mcp_url)[0]
+        )
+        if defer:
+            summary_handle = defer_plan_results(results, conversation_id)
+        else:
+            summarize_plan_results(results)
+            summary_handle = None
         
         # Return the execution results in Cursor envelope format
-        return jsonify({
+        envelope = {
             "status": "completed",
             "results": results
-        })
+        }
+        if summary_handle:
+            envelope["summaryHandle"] = summary_handle
+        return jsonify(envelope)
         
     except Exception as execution_error:
         print("Error executing AI plan:", execution_error)
@@ -932,37 +1418,123 @@ def proxy_ai_execute():
             "details": str(execution_error)
         }), 500
 
-def handle_chat_mode(provider, prompt, api_keys, conversation_history=None):
+# Streaming variant of plan execution - emits an SSE event as each action starts, finishes or fails
+@app.route("/proxy/ai/execute/stream", methods=["POST", "OPTIONS"])
+def proxy_ai_execute_stream():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({"error": "No JSON data received"}), 400
+        
+    actions = data.get("actions")
+    mcp_url = data.get("mcpUrl")
+    server_name = data.get("serverName")
+    
+    # Support serverName routing
+    if not mcp_url and server_name and server_name != ALL_SERVERS:
+        mcp_url = get_server_url(server_name)
+        if not mcp_url:
+            return jsonify({"error": f"Server '{server_name}' not found in configuration"}), 400
+    
+    if not actions or not isinstance(actions, list):
+        return jsonify({"error": "Invalid actions"}), 400
+    
+    # Namespaced tools from the merged catalog carry their own server
+    if not mcp_url and not all(isinstance(action, dict) and route_plan_action(action, None)[0] for action in actions):
+        return jsonify({"error": "Missing MCP webhook URL or serverName"}), 400
+    
+    try:
+        plan_executor.resolve_dependencies(actions)
+    except ValueError as dependency_error:
+        return jsonify({"error": "Invalid action dependencies", "details": str(dependency_error)}), 400
+    
+    state = {"cancelled": False}
+    
+    def produce():
+        yield f"data: {json.dumps({'type': 'status', 'message': f'Executing {len(actions)} actions...'})}\n\n"
+        
+        events = queue.Queue()
+        
+        def on_event(event, index, result):
+            events.put(("action", event, index, result))
+        
+        def run_plan():
+            try:
+                results = plan_executor.execute(
+                    actions,
+                    lambda action: run_plan_action(mcp_url, action),
+                    server_for=lambda action: route_plan_action(action, mcp_url)[0],
+                    on_event=on_event,
+                    # A client that has gone away must not trigger any more tool calls
+                    cancelled=lambda: state["cancelled"]
+                )
+                events.put(("done", None, None, results))
+            except Exception as execution_error:
+                print("Error executing AI plan:", execution_error)
+                events.put(("error", None, None, str(execution_error)))
+        
+        threading.Thread(target=run_plan, daemon=True).start()
+        
+        while True:
+            kind, event, index, result = events.get()
+            
+            if kind == "action":
+                tool = actions[index].get("tool") if isinstance(actions[index], dict) else None
+                if event == "started":
+                    chunk = {'type': 'status', 'message': f'Running {tool}...', 'index': index, 'action': tool}
+                elif event == "completed":
+                    chunk = {'type': 'chunk', 'index': index, 'action': tool, 'data': result}
+                else:
+                    chunk = {'type': 'error', 'index': index, 'action': tool, 'error': 'Action failed',
+                             'details': result.get("error"), 'data': result}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            elif kind == "done":
+                # Same body /proxy/ai/execute returns, in plan order
+                yield f"data: {json.dumps({'type': 'complete', 'data': {'status': 'completed', 'results': result}})}\n\n"
+                yield f"data: {json.dumps({'type': 'status', 'message': 'Response complete'})}\n\n"
+                break
+            else:
+                yield f"data: {json.dumps({'type': 'error', 'error': 'Failed to execute AI plan', 'details': result})}\n\n"
+                break
+    
+    def generate():
+        finished = False
+        try:
+            # Heartbeats surface a closed client connection even while a tool call is silent
+            for chunk in relay_with_heartbeat(produce, state):
+                yield chunk
+            finished = True
+        finally:
+            if not finished:
+                print("✂️ Client disconnected, not starting the remaining plan actions")
+                state["cancelled"] = True
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'Connection': 'keep-alive',
+                           'Access-Control-Allow-Origin': '*', 'Access-Control-Allow-Headers': 'Cache-Control'})
+
+def handle_chat_mode(provider, prompt, api_keys, conversation_history=None, use_cache=True):
     try:
         # Check if provider is groq - use Modal endpoint instead of Groq API
         if provider == "groq":
             print("🔄 Chat Mode: Using Groq provider - routing to Modal endpoint")
             
             try:
-                # Call your Modal endpoint directly
-                modal_response = requests.post(
-                    MODAL_ENDPOINT,
-                    headers={"Content-Type": "application/json"},
-                    json={"prompt": prompt},
-                    timeout=60
-                )
+                # Call your Modal endpoint over the shared LLM client
+                response_text, cached = modal_chat_reply(prompt, use_cache)
                 
-                if modal_response.status_code == 200:
-                    modal_data = modal_response.json()
-                    response_text = modal_data.get("response", "No response from Modal endpoint")
-                    
-                    # Return in the expected format
-                    return jsonify({
-                        "mode": "chat",
-                        "response": response_text,
-                        "plan": "Tensora AI response",
-                        "actions": [],
-                        "confidence": 100
-                    })
-                else:
-                    error_msg = f"Modal endpoint error: {modal_response.status_code}"
-                    print(error_msg)
-                    return jsonify({"error": error_msg}), 500
+                # Return in the expected format
+                return jsonify({
+                    "mode": "chat",
+                    "response": response_text,
+                    "plan": "Tensora AI response",
+                    "actions": [],
+                    "confidence": 100,
+                    "cached": cached
+                })
                     
             except Exception as modal_error:
                 print(f"Modal endpoint call failed: {modal_error}")
@@ -982,61 +1554,23 @@ def handle_chat_mode(provider, prompt, api_keys, conversation_history=None):
         
         system_prompt = intent_parser.get_enhanced_system_prompt([], prompt, "chat")
         
-        endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={gemini_api_key}"
-        headers = {"Content-Type": "application/json"}
-        
         # Build conversation contents for Gemini
-        contents = []
-        
-        # Add system prompt as first message
-        contents.append({
-            "parts": [{"text": system_prompt}],
-            "role": "user"
-        })
-        contents.append({
-            "parts": [{"text": "I understand. I'll help you with your questions and remember our conversation context."}],
-            "role": "model"
-        })
-        
-        # Add conversation history
-        if conversation_history:
-            for msg in conversation_history:
-                role = "user" if msg["role"] == "user" else "model"
-                contents.append({
-                    "parts": [{"text": msg["content"]}],
-                    "role": role
-                })
-        
-        # Add current user message
-        contents.append({
-            "parts": [{"text": prompt}],
-            "role": "user"
-        })
-        
-        body = {
-            "contents": contents,
-            "generationConfig": {"temperature": 0.7, "maxOutputTokens": 1000}
-        }
-        
-        print(f"Sending chat request to Gemini API (for {provider} provider)")
-        response = requests.post(
-            endpoint,
-            headers=headers,
-            json=body,
-            timeout=60
-        )
-        
-        if not response.ok:
-            error_data = response.json()
-            print(f"Gemini API error:", error_data)
-            return jsonify({
-                "error": f"Gemini API error: {error_data.get('error', {}).get('message', response.reason)}"
-            }), 500
+        contents = build_gemini_contents(system_prompt, conversation_history, prompt)
         
-        response_data = response.json()
+        def generate():
+            print(f"Sending chat request to Gemini API (for {provider} provider)")
+            return llm_client.gemini_generate(contents, CHAT_GENERATION_CONFIG)
         
-        # Parse response from Gemini
-        response_text = response_data["candidates"][0]["content"]["parts"][0]["text"]
+        try:
+            # Repeated questions with the same history are answered from the response cache
+            if use_cache:
+                response_text, cached = chat_cache.get_or_set(
+                    chat_cache_key(system_prompt, conversation_history, prompt), generate)
+            else:
+                response_text, cached = generate(), False
+        except LLMError as llm_error:
+            print("Gemini API error:", llm_error)
+            return jsonify({"error": str(llm_error)}), 500
         
         # Return chat response in a format compatible with the frontend
         return jsonify({
@@ -1044,7 +1578,8 @@ def handle_chat_mode(provider, prompt, api_keys, conversation_history=None):
             "response": response_text,
             "plan": "Conversational response",
             "actions": [],
-            "confidence": 100
+            "confidence": 100,
+            "cached": cached
         })
         
     except Exception as err:
@@ -1101,6 +1636,31 @@ def get_conversations():
         print("Get conversations error:", str(err))
         return jsonify({"error": str(err)}), 500
 
+# SSE feed of conversation updates (background titles and summaries), optionally for one conversation
+@app.route("/conversations/events", methods=["GET"])
+def conversation_events():
+    conversation_id = request.args.get("conversation_id")
+    subscriber = event_bus.subscribe()
+    
+    def generate():
+        try:
+            yield f"data: {json.dumps({'type': 'status', 'message': 'Subscribed to conversation events'})}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if conversation_id and event.get("conversation_id") != conversation_id:
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'Connection': 'keep-alive',
+                           'Access-Control-Allow-Origin': '*', 'Access-Control-Allow-Headers': 'Cache-Control'})
+
 @app.route("/conversation/<conversation_id>", methods=["GET", "OPTIONS"])
 def get_conversation(conversation_id):
     if request.method == "OPTIONS":
@@ -1170,6 +1730,12 @@ def add_message():
         if not all([conversation_id, role, content]):
             return jsonify({"error": "Missing required fields: conversation_id, role, content"}), 400
         
+        # A deferred summary that finished before the message was saved is stored with it
+        if isinstance(metadata, dict) and metadata.get("summaryHandle") and "summary" not in metadata:
+            job = summary_jobs.get(metadata["summaryHandle"])
+            if job and job["status"] == "completed":
+                metadata["summary"] = job["summary"]
+        
         success = conversation_manager.add_message(
             conversation_id, role, content, message_type, metadata
         )
@@ -1187,6 +1753,74 @@ def add_message():
         print("Add message error:", str(err))
         return jsonify({"error": str(err)}), 500
 
+# Deferred tool-output summaries
+@app.route("/proxy/summary/<handle>", methods=["GET", "OPTIONS"])
+def get_summary(handle):
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    # ?wait=N long-polls for up to N seconds while the summary is pending
+    try:
+        wait = min(float(request.args.get("wait", 0)), SUMMARY_STREAM_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    
+    job = summary_jobs.get(handle, wait=wait)
+    if not job:
+        return jsonify({"error": "Unknown or expired summary handle"}), 404
+    return jsonify(job)
+
+# Bulk title generation for conversations still called "New Chat"
+@app.route("/conversations/titles/backfill", methods=["POST", "OPTIONS"])
+def backfill_conversation_titles():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        provider = data.get("provider", "gemini")
+        model = data.get("model")
+        limit = data.get("limit")
+        if limit is not None and (not isinstance(limit, int) or limit < 1):
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        
+        running = title_backfill.active_job()
+        if running:
+            return jsonify({"error": "A title backfill is already running", "job": running}), 409
+        
+        conversations = conversation_manager.get_untitled_conversations(limit)
+        
+        def store_title(conversation_id, title):
+            # Backfilled titles should not reorder the conversation list
+            conversation_manager.update_conversation_title(conversation_id, title, touch=False)
+            event_bus.publish({"type": "title", "conversation_id": conversation_id, "title": title})
+        
+        # start() re-checks and claims the job atomically, in case another worker raced us here
+        job = title_backfill.start(
+            conversations,
+            lambda queries: title_generator.generate_titles(queries, provider, model),
+            store_title
+        )
+        return jsonify(job), 202
+    except BackfillRunningError as running_error:
+        return jsonify({"error": "A title backfill is already running", "job": running_error.job}), 409
+    except BackfillUnavailableError as unavailable_error:
+        print("Title backfill unavailable:", str(unavailable_error))
+        return jsonify({"error": "Title backfill is unavailable on this server"}), 503
+    except Exception as err:
+        print("Title backfill error:", str(err))
+        return jsonify({"error": str(err)}), 500
+
+@app.route("/conversations/titles/backfill/<job_id>", methods=["GET", "OPTIONS"])
+def get_title_backfill(job_id):
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    job = title_backfill.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown backfill job"}), 404
+    return jsonify(job)
+
 @app.route("/conversation/<conversation_id>/title", methods=["PUT", "OPTIONS"])
 def update_conversation_title(conversation_id):
     if request.method == "OPTIONS":
@@ -1214,6 +1848,87 @@ def update_conversation_title(conversation_id):
         print("Update title error:", str(err))
         return jsonify({"error": str(err)}), 500
 
+# Admin endpoints for the MCP tools cache
+@app.route("/admin/tools-cache", methods=["GET", "DELETE", "OPTIONS"])
+def tools_cache_admin():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    if request.method == "GET":
+        return jsonify(tools_cache.get_stats())
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        url = data.get("url") or request.args.get("url")
+        server_name = data.get("serverName") or request.args.get("serverName")
+        
+        if not url and server_name:
+            url = get_server_url(server_name)
+            if not url:
+                return jsonify({"error": f"Server '{server_name}' not found in configuration"}), 404
+        
+        purged = tools_cache.purge(url)
+        return jsonify({"purged": purged, "url": url})
+    except Exception as err:
+        print("Purge tools cache error:", str(err))
+        return jsonify({"error": str(err)}), 500
+
+# LLM response caches exposed through /admin/llm-cache
+LLM_CACHES = {"chat": chat_cache}
+if getattr(converter, "cache", None):
+    LLM_CACHES["conversions"] = converter.cache
+
+# Admin endpoint for LLM response cache statistics and clearing
+@app.route("/admin/llm-cache", methods=["GET", "DELETE", "OPTIONS"])
+def llm_cache_admin():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    if request.method == "GET":
+        return jsonify({name: cache.get_stats() for name, cache in LLM_CACHES.items()})
+    
+    try:
+        data = request.get_json(silent=True) or {}
+        name = data.get("cache") or request.args.get("cache")
+        if name and name not in LLM_CACHES:
+            return jsonify({"error": f"Unknown cache '{name}'"}), 404
+        
+        names = [name] if name else list(LLM_CACHES)
+        return jsonify({"cleared": {cache_name: LLM_CACHES[cache_name].clear() for cache_name in names}})
+    except Exception as err:
+        print("Clear LLM cache error:", str(err))
+        return jsonify({"error": str(err)}), 500
+
+# Admin endpoint for MCP connection pools, sessions, bulkheads and background work counters
+@app.route("/admin/mcp", methods=["GET", "OPTIONS"])
+def mcp_admin():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    try:
+        with stream_stats_lock:
+            streams = dict(stream_stats)
+        return jsonify({**mcp_client.get_stats(), "bulkheads": bulkheads.get_stats(), "streams": streams,
+                        "retries": retry_policy.get_stats(), "summaries": summary_jobs.get_stats(),
+                        "titles": title_worker.get_stats(), "title_backfill": title_backfill.get_stats(),
+                        "events": event_bus.get_stats(), "context": context_builder.get_stats(),
+                        "context_cache": context_cache.get_stats()})
+    except Exception as err:
+        print("MCP stats error:", str(err))
+        return jsonify({"error": str(err)}), 500
+
+# Admin endpoint for per-server circuit breaker state and latency percentiles
+@app.route("/admin/breakers", methods=["GET", "OPTIONS"])
+def breakers_admin():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"})
+    
+    try:
+        return jsonify({"servers": health_tracker.get_stats()})
+    except Exception as err:
+        print("Breaker stats error:", str(err))
+        return jsonify({"error": str(err)}), 500
+
 # Health check endpoint for Docker/Render
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -1222,6 +1937,6 @@ def health_check():
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 4000))
     print(f"🚀 MCP Proxy running at http://0.0.0.0:{port}")
-    print(f"🔗 Groq provider uses Modal endpoint: {MODAL_ENDPOINT}")
+    print(f"🔗 Groq provider uses Modal endpoint: {llm_client.modal_url}")
     print(f"🔄 OpenAI and Claude providers redirect to Gemini")
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
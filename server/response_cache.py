@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+class ResponseCache:
+    """In-memory LRU cache with a TTL for LLM responses, optionally backed by a SQLite file.
+
+    Keys are digests of the request parts (see make_key); values must be JSON-serializable.
+    The memory tier is bounded by entry count and, if max_bytes is set, by the encoded size
+    of its values. The disk tier survives restarts and is shared by every worker process.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, ttl: float = 3600,
+                 disk_path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_path = disk_path
+
+        self._entries = OrderedDict()  # key -> {"value": Any, "stored_at": float, "size": int}
+        self._bytes = 0
+        self._pending = {}  # key -> Event set when the computing caller finishes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            with self._connect() as db:
+                db.execute(f"CREATE TABLE IF NOT EXISTS {self.name} (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Digest of the canonical (sorted-keys, compact) JSON encoding of parts"""
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a fresh connection: committed or rolled back, then always closed"""
+        db = sqlite3.connect(self.disk_path, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry["stored_at"] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["value"]
+            if entry:
+                self._bytes -= self._entries.pop(key)["size"]
+
+        if self.disk_path:
+            try:
+                with self._connect() as db:
+                    row = db.execute(f"SELECT value, stored_at FROM {self.name} WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    with self._lock:
+                        self.disk_hits += 1
+                    return value
+            except sqlite3.Error as e:
+                print(f"⚠️ {self.name} disk cache read failed: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value in memory and, when configured, on disk"""
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        if self.disk_path:
+            try:
+                with self._connect() as db:
+                    db.execute(f"INSERT OR REPLACE INTO {self.name} (key, value, stored_at) VALUES (?, ?, ?)",
+                               (key, json.dumps(value), stored_at))
+                    db.execute(f"DELETE FROM {self.name} WHERE stored_at < ?", (stored_at - self.ttl,))
+            except sqlite3.Error as e:
+                print(f"⚠️ {self.name} disk cache write failed: {e}")
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        """Insert into the in-memory tier, evicting least recently used entries"""
+        size = len(json.dumps(value).encode("utf-8"))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)["size"]
+            self._entries[key] = {"value": value, "stored_at": stored_at, "size": size}
+            self._bytes += size
+            # The newest entry is always kept, even if it alone exceeds max_bytes
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or (self.max_bytes and self._bytes > self.max_bytes)):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted["size"]
+
+    def get_or_set(self, key: str, compute: Callable[[], Any]) -> tuple:
+        """Return (value, cached), calling compute() and storing its result on a miss.
+
+        Concurrent misses for the same key compute once; the other callers wait for and
+        reuse that result. Exceptions from compute() are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = threading.Event()
+
+        if not owner:
+            pending.wait()
+            value = self.get(key)
+            if value is not None:
+                return value, True
+            # The computing caller failed; try again ourselves
+            return self.get_or_set(key, compute)
+
+        try:
+            value = compute()
+            self.set(key, value)
+            return value, False
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+
+    def clear(self) -> int:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_path:
+            try:
+                with self._connect() as db:
+                    db.execute(f"DELETE FROM {self.name}")
+            except sqlite3.Error as e:
+                print(f"⚠️ {self.name} disk cache clear failed: {e}")
+        return count
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'disk_path': self.disk_path,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else None
+            }
+
+# Exact-match cache for chat-mode replies
+chat_cache = ResponseCache(
+    "chat_responses",
+    max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 1000)),
+    ttl=float(os.getenv("CHAT_CACHE_TTL", 3600)),
+    disk_path=os.getenv("CHAT_CACHE_PATH") or None
+)
@@ -0,0 +1,107 @@
+import os
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+class RetryPolicy:
+    """Hedged requests plus bounded, jittered retries for idempotent MCP calls.
+
+    Only callers that know a request is safe to repeat should use this: a hedge sends a
+    second copy while the first is still running, and both may reach the server.
+    """
+
+    # Transport failures and 5xx responses are worth another attempt; load-shedding
+    # rejections (open circuit, full bulkhead) and parse errors are not
+    RETRYABLE = (requests.ConnectionError, requests.Timeout, requests.HTTPError)
+
+    def __init__(self, max_retries: int = None, base_delay: float = None, max_delay: float = None,
+                 hedge_delay: float = None, min_hedge_delay: float = None, max_workers: int = None):
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("MCP_RETRY_MAX_ATTEMPTS", 2))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv("MCP_RETRY_BASE_DELAY", 0.2))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv("MCP_RETRY_MAX_DELAY", 2))
+        # A hedge is sent once the first attempt is slower than the server's p95 latency,
+        # clamped to [min_hedge_delay, hedge_delay]; hedge_delay alone applies until p95 is known
+        self.hedge_delay = hedge_delay if hedge_delay is not None else float(os.getenv("MCP_HEDGE_DELAY", 1))
+        self.min_hedge_delay = min_hedge_delay if min_hedge_delay is not None else float(os.getenv("MCP_HEDGE_MIN_DELAY", 0.05))
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("MCP_HEDGE_WORKERS", 16)),
+            thread_name_prefix="hedge"
+        )
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def hedge_after(self, p95: Optional[float]) -> float:
+        """Seconds to wait on the first attempt before sending a hedge"""
+        if p95 is None:
+            return self.hedge_delay
+        return max(self.min_hedge_delay, min(self.hedge_delay, p95))
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter exponential backoff before the given retry (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+
+    def run(self, attempt: Callable[[], Any], hedge_after: Optional[float] = None) -> Any:
+        """Call attempt() hedged, retrying RETRYABLE failures up to max_retries times"""
+        with self._lock:
+            self.calls += 1
+        hedge_after = hedge_after if hedge_after is not None else self.hedge_delay
+
+        for retry in range(self.max_retries + 1):
+            try:
+                return self._hedged(attempt, hedge_after)
+            except self.RETRYABLE as e:
+                if retry == self.max_retries:
+                    raise
+                delay = self.backoff(retry)
+                with self._lock:
+                    self.retries += 1
+                print(f"🔁 Retrying idempotent MCP request in {delay:.2f}s after: {e}")
+                time.sleep(delay)
+
+    def _hedged(self, attempt: Callable[[], Any], hedge_after: float) -> Any:
+        """Run attempt(), starting a second copy if the first is slower than hedge_after"""
+        first = self._executor.submit(attempt)
+        try:
+            return first.result(timeout=hedge_after)
+        except FutureTimeoutError:
+            pass
+
+        with self._lock:
+            self.hedges += 1
+        second = self._executor.submit(attempt)
+
+        # First success wins; the other attempt finishes in the background and is discarded
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def get_stats(self) -> Dict:
+        """Get hedging and retry counters"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'retries': self.retries,
+                'max_retries': self.max_retries,
+                'hedge_delay': self.hedge_delay
+            }
+
+# Global instance
+retry_policy = RetryPolicy()
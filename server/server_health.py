@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because a server's circuit breaker is open"""
+
+class ServerHealth:
+    """Rolling latency percentiles and circuit breaker state for one MCP server"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str, window: int, failure_threshold: int, reset_timeout: float,
+                 min_timeout: float, max_timeout: float, timeout_multiplier: float, min_samples: int):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+
+        self.window = window
+        self.latencies = deque(maxlen=window)
+        self.method_latencies = {}  # JSON-RPC method -> deque of latencies
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.probe_started_at = None
+        self.total_successes = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def percentile(self, p: float, method: Optional[str] = None) -> Optional[float]:
+        """Latency percentile (0-100) over the rolling window of one method (or all), or None without samples"""
+        with self._lock:
+            samples = sorted(self.method_latencies.get(method, ()) if method else self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def timeout(self, default: float, method: Optional[str] = None) -> float:
+        """Adaptive read timeout derived from the method's p99 latency, or default until enough samples exist.
+
+        Latencies are kept per method so fast tools/list and initialize calls never shrink
+        the timeout of a slow tools/call.
+        """
+        if not method:
+            return default
+        with self._lock:
+            enough = len(self.method_latencies.get(method, ())) >= self.min_samples
+        if not enough:
+            return default
+        p99 = self.percentile(99, method)
+        return max(self.min_timeout, min(self.max_timeout, p99 * self.timeout_multiplier))
+
+    def before_request(self) -> bool:
+        """Admit a request or raise CircuitOpenError; returns True when the request is the half-open probe.
+
+        An open circuit lets one probe through after reset_timeout. The caller must settle
+        the probe with record_success, record_failure or release_probe; a probe left
+        unsettled for reset_timeout is abandoned and the next caller probes instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and self.probe_in_flight and now - self.probe_started_at >= self.reset_timeout:
+                print(f"⏱️ Half-open probe for MCP server {self.url} never settled, probing again")
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.probe_started_at = now
+                return True
+            self.rejected += 1
+            retry_in = max(0, self.reset_timeout - (now - self.opened_at))
+            raise CircuitOpenError(f"Circuit open for MCP server {self.url}, retry in {retry_in:.0f}s")
+
+    def release_probe(self):
+        """Give up the half-open probe without a verdict (e.g. a cancelled or rejected call)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+
+    def record_success(self, latency: float, method: Optional[str] = None):
+        """Record a response latency and close the circuit"""
+        with self._lock:
+            self.latencies.append(latency)
+            if method:
+                self.method_latencies.setdefault(method, deque(maxlen=self.window)).append(latency)
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self.state != self.CLOSED:
+                print(f"✅ Circuit closed for MCP server {self.url}")
+            self.state = self.CLOSED
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit at the threshold or on a failed probe"""
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🚫 Circuit opened for MCP server {self.url} after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and latency percentiles"""
+        p50, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'successes': self.total_successes,
+                'failures': self.total_failures,
+                'rejected': self.rejected,
+                'samples': len(self.latencies),
+                'latency_p50': p50,
+                'latency_p95': p95,
+                'latency_p99': p99,
+                'methods': {method: len(samples) for method, samples in self.method_latencies.items()}
+            }
+
+class HealthTracker:
+    """Per-server health trackers for every MCP server the proxy talks to"""
+
+    def __init__(self):
+        self.window = int(os.getenv("MCP_LATENCY_WINDOW", 200))
+        self.failure_threshold = int(os.getenv("MCP_BREAKER_FAILURE_THRESHOLD", 5))
+        self.reset_timeout = float(os.getenv("MCP_BREAKER_RESET_SECONDS", 30))
+        self.min_timeout = float(os.getenv("MCP_MIN_TIMEOUT", 15))
+        self.max_timeout = float(os.getenv("MCP_MAX_TIMEOUT", 60))
+        self.timeout_multiplier = float(os.getenv("MCP_TIMEOUT_MULTIPLIER", 3))
+        self.min_samples = int(os.getenv("MCP_TIMEOUT_MIN_SAMPLES", 20))
+
+        self._servers = {}  # server url -> ServerHealth
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> ServerHealth:
+        """Return the health tracker for a server URL"""
+        with self._lock:
+            health = self._servers.get(url)
+            if health is None:
+                health = ServerHealth(
+                    url, self.window, self.failure_threshold, self.reset_timeout,
+                    self.min_timeout, self.max_timeout, self.timeout_multiplier, self.min_samples
+                )
+                self._servers[url] = health
+            return health
+
+    def get_stats(self) -> Dict:
+        """Get breaker state for every tracked server"""
+        with self._lock:
+            servers = dict(self._servers)
+        return {url: health.get_stats() for url, health in servers.items()}
+
+# Global instance
+health_tracker = HealthTracker()
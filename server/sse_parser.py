@@ -0,0 +1,126 @@
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Upper bound on how much of a single MCP response body is read into memory
+MAX_RESPONSE_BYTES = int(os.getenv("MCP_MAX_RESPONSE_BYTES", 10 * 1024 * 1024))
+
+class ResponseTooLargeError(Exception):
+    """Raised when an MCP response body exceeds the configured size limit"""
+
+class SSEParseError(Exception):
+    """Raised when a response ends without a usable JSON-RPC frame"""
+
+    def __init__(self, message: str, raw: str = ""):
+        super().__init__(message)
+        self.raw = raw
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """Incrementally parse Server-Sent Event lines into {"event", "data", "id"} dicts"""
+    event = {"event": "message", "data": [], "id": None}
+    for line in lines:
+        line = line.rstrip("\r")
+        if not line:
+            # Blank line dispatches the buffered event
+            if event["data"]:
+                yield {"event": event["event"], "data": "\n".join(event["data"]), "id": event["id"]}
+            event = {"event": "message", "data": [], "id": None}
+            continue
+        if line.startswith(":"):
+            continue  # comment / keep-alive
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            event["data"].append(value)
+        elif field == "event":
+            event["event"] = value
+        elif field == "id":
+            event["id"] = value
+
+    # Streams may end without a trailing blank line
+    if event["data"]:
+        yield {"event": event["event"], "data": "\n".join(event["data"]), "id": event["id"]}
+
+def iter_limited_lines(response, max_bytes: int = MAX_RESPONSE_BYTES) -> Iterator[str]:
+    """Yield decoded lines from a streamed response, enforcing a total size limit"""
+    total = 0
+    for raw_line in response.iter_lines(chunk_size=8192):
+        total += len(raw_line) + 1
+        if total > max_bytes:
+            raise ResponseTooLargeError(f"MCP response exceeded {max_bytes} bytes")
+        yield raw_line.decode("utf-8", errors="replace")
+
+def read_limited_body(response, max_bytes: int = MAX_RESPONSE_BYTES) -> str:
+    """Read a streamed response body, enforcing a total size limit"""
+    chunks = []
+    total = 0
+    for chunk in response.iter_content(chunk_size=65536):
+        total += len(chunk)
+        if total > max_bytes:
+            raise ResponseTooLargeError(f"MCP response exceeded {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+def is_notification(message: Any) -> bool:
+    """Check whether a JSON-RPC message is a server notification"""
+    return isinstance(message, dict) and "method" in message and "id" not in message
+
+def matches_request(message: Any, request_id: Optional[str]) -> bool:
+    """Check whether a JSON-RPC message is the response to request_id"""
+    if not isinstance(message, dict) or is_notification(message):
+        return False
+    if request_id is None or "id" not in message:
+        return True
+    return str(message.get("id")) == str(request_id)
+
+def read_jsonrpc_response(response, request_id: Optional[str] = None,
+                          on_notification: Optional[Callable[[Dict], None]] = None,
+                          max_bytes: int = MAX_RESPONSE_BYTES) -> Any:
+    """Read the JSON-RPC response for request_id from an MCP HTTP response.
+
+    SSE bodies are parsed frame by frame and reading stops as soon as the matching
+    frame arrives; notifications seen before it are passed to on_notification.
+    Plain JSON bodies are read up to max_bytes and decoded once.
+    """
+    content_type = response.headers.get("content-type", "")
+
+    if "text/event-stream" in content_type:
+        seen = []
+        for event in iter_sse_events(iter_limited_lines(response, max_bytes)):
+            try:
+                message = json.loads(event["data"])
+            except json.JSONDecodeError:
+                print("⚠️ Failed to parse SSE data line:", event["data"][:200])
+                seen.append(event["data"])
+                continue
+            if is_notification(message):
+                if on_notification:
+                    on_notification(message)
+                continue
+            if matches_request(message, request_id):
+                return message
+        raise SSEParseError("Could not parse SSE data", "\n".join(seen))
+
+    text = read_limited_body(response, max_bytes)
+
+    # Some servers send SSE frames without the event-stream content type
+    if text.startswith("event:") or text.startswith("data:") or "\ndata:" in text:
+        for event in iter_sse_events(text.splitlines()):
+            try:
+                message = json.loads(event["data"])
+            except json.JSONDecodeError:
+                continue
+            if is_notification(message):
+                if on_notification:
+                    on_notification(message)
+                continue
+            if matches_request(message, request_id):
+                return message
+        raise SSEParseError("Could not parse SSE data", text)
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise SSEParseError(str(e), text)
@@ -0,0 +1,153 @@
+import json
+from typing import Any, Callable, List, Optional, Tuple
+from html_formatter import format_tool_result
+
+# Plain-text tool output up to this length is shown as-is rather than summarized
+MAX_PASSTHROUGH_TEXT = 2000
+
+class SummarizerRegistry:
+    """Ordered registry of local summarizers for known MCP tool result shapes.
+
+    Each summarizer takes the tool output and returns a summary string, or None when
+    the shape is not one it understands. The first match wins; outputs no summarizer
+    claims fall through to the LLM.
+    """
+
+    def __init__(self):
+        self._summarizers: List[Tuple[str, Callable[[Any], Optional[str]]]] = []
+
+    def register(self, name: str):
+        """Decorator registering a summarizer; registration order is match order"""
+        def decorator(func: Callable[[Any], Optional[str]]):
+            self._summarizers.append((name, func))
+            return func
+        return decorator
+
+    def names(self) -> List[str]:
+        """Registered summarizer names in match order"""
+        return [name for name, _ in self._summarizers]
+
+    def summarize(self, data: Any) -> Optional[str]:
+        """Return the first registered summarizer's output for data, or None"""
+        for name, func in self._summarizers:
+            try:
+                summary = func(data)
+            except Exception as e:
+                print(f"⚠️ Summarizer {name} failed: {e}")
+                continue
+            if summary is not None:
+                print(f"⚡ Summarized tool output locally with {name}")
+                return summary
+        return None
+
+def text_parts(data: Any) -> Optional[List[str]]:
+    """Return the text parts of an MCP {"content": [{"type": "text", ...}]} result"""
+    if not isinstance(data, dict) or not isinstance(data.get("content"), list):
+        return None
+    parts = [item.get("text") for item in data["content"]
+             if isinstance(item, dict) and item.get("type") == "text" and isinstance(item.get("text"), str)]
+    return parts or None
+
+def zapier_payload(data: Any) -> Optional[dict]:
+    """Decode the Zapier action payload double-encoded in a tool result's text content"""
+    parts = text_parts(data)
+    if not parts or len(parts) != 1:
+        return None
+    try:
+        payload = json.loads(parts[0])
+    except json.JSONDecodeError:
+        return None
+    if isinstance(payload, dict) and "actionId" in payload and "result" in payload:
+        return payload
+    return None
+
+def status_of(payload: dict) -> str:
+    return "success" if str(payload.get("status", "")).upper() == "SUCCESS" else str(payload.get("status") or "unknown").lower()
+
+def structured_summary(app: str, status: str, action: str, content: str, outcome: str) -> str:
+    """Lay a summary out in the same sections the LLM prompt asks for"""
+    return "\n".join([
+        f"{app} Summary:",
+        f"Status: {status}",
+        f"Key Action: {action}",
+        f"Main Content: {content}",
+        f"Result/Outcome: {outcome}"
+    ])
+
+# Global instance
+summarizers = SummarizerRegistry()
+
+@summarizers.register("zapier_gmail")
+def summarize_zapier_gmail(data: Any) -> Optional[str]:
+    """Zapier Gmail find/search results: a list of messages with subject and sender"""
+    payload = zapier_payload(data)
+    if not payload or not isinstance(payload["result"], list):
+        return None
+    emails = payload["result"]
+    if not all(isinstance(email, dict) and "subject" in email and "from" in email for email in emails):
+        return None
+
+    lines = [f"Found {len(emails)} email{'s' if len(emails) != 1 else ''}"]
+    for index, email in enumerate(emails, 1):
+        sender = email.get("from") or {}
+        sender = (sender.get("name") or sender.get("email")) if isinstance(sender, dict) else str(sender)
+        lines.append(f"{index}. {email.get('subject') or '(no subject)'} - from {sender or 'unknown sender'}, {email.get('date', 'unknown date')}")
+        body = (email.get("body_plain") or "").strip()
+        if body:
+            lines.append(f"   {body[:300]}{'...' if len(body) > 300 else ''}")
+        if email.get("attachment_count"):
+            lines.append(f"   Attachments: {email['attachment_count']}")
+
+    return structured_summary(
+        "Gmail",
+        status_of(payload),
+        payload.get("instructions") or "Searched emails",
+        "\n".join(lines),
+        f"{len(emails)} email{'s' if len(emails) != 1 else ''} returned"
+    )
+
+@summarizers.register("zapier_linkedin")
+def summarize_zapier_linkedin(data: Any) -> Optional[str]:
+    """Zapier LinkedIn share update results: the posted comment, visibility and post URL"""
+    payload = zapier_payload(data)
+    if not payload or not isinstance(payload["result"], dict):
+        return None
+    url = payload["result"].get("url") or ""
+    if "linkedin.com" not in url:
+        return None
+
+    parameters = payload.get("parameters") or {}
+    resolved = payload.get("resolvedParameters") or {}
+    visibility = (resolved.get("visibility__code") or {}).get("label") or parameters.get("visibility__code")
+
+    content = parameters.get("comment") or "LinkedIn update"
+    if visibility:
+        content += f"\nVisibility: {visibility}"
+
+    return structured_summary(
+        "LinkedIn",
+        status_of(payload),
+        payload.get("instructions") or "Posted an update on LinkedIn",
+        content,
+        f"Post published: {url}" if status_of(payload) == "success" else "Post was not published"
+    )
+
+@summarizers.register("plain_text")
+def summarize_plain_text(data: Any) -> Optional[str]:
+    """Short plain-text content is already readable"""
+    parts = text_parts(data)
+    if not parts:
+        return None
+    text = "\n".join(parts).strip()
+    if not text or len(text) > MAX_PASSTHROUGH_TEXT or text[0] in "{[":
+        return None
+    return text
+
+@summarizers.register("flat_record")
+def summarize_flat_record(data: Any) -> Optional[str]:
+    """Small flat objects of scalar fields read fine as key: value lines"""
+    if not isinstance(data, dict) or not data or len(data) > 12 or "content" in data:
+        return None
+    if not all(value is None or isinstance(value, (str, int, float, bool)) for value in data.values()):
+        return None
+    return format_tool_result(data).strip()
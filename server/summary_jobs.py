@@ -0,0 +1,161 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+class SummaryJobs:
+    """Background pool for LLM summaries that are delivered after the tool result.
+
+    submit() returns a handle straight away; the summary is computed on a worker and
+    can be waited on or polled by handle until it expires ttl seconds after finishing.
+    Job state is kept in a SQLite file shared by every worker process, so a handle can
+    be polled on any worker; jobs submitted by this process are also tracked in memory.
+    """
+
+    # How often a wait on another process's job re-reads the shared store
+    POLL_SECONDS = 0.25
+
+    def __init__(self, workers: int = None, ttl: float = None, db_path: str = None):
+        self.workers = workers or int(os.getenv("SUMMARY_WORKERS", 4))
+        self.ttl = ttl or float(os.getenv("SUMMARY_TTL", 600))
+        self.db_path = db_path or os.getenv("SUMMARY_JOBS_PATH") or os.path.join(tempfile.gettempdir(), "tensora_summary_jobs.db")
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="summary")
+        self._jobs = {}  # handle -> {"status", "summary", "error", "finished_at", "done": Event}
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.failed = 0
+
+        try:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS summary_jobs (handle TEXT PRIMARY KEY, status TEXT, "
+                           "summary TEXT, error TEXT, created_at REAL, finished_at REAL)")
+        except sqlite3.Error as e:
+            print(f"⚠️ Summary job store unavailable, handles only resolve on this worker: {e}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a fresh connection: committed or rolled back, then always closed"""
+        db = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _store(self, handle: str, job: Dict, created_at: float):
+        """Write a job's state to the shared store"""
+        try:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO summary_jobs (handle, status, summary, error, created_at, finished_at) "
+                           "VALUES (?, ?, ?, ?, ?, ?)",
+                           (handle, job["status"], json.dumps(job["summary"]), job["error"], created_at, job["finished_at"]))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"⚠️ Summary {handle} could not be shared with other workers: {e}")
+
+    def _load(self, handle: str) -> Optional[Dict]:
+        """Read a job's state from the shared store"""
+        try:
+            with self._connect() as db:
+                row = db.execute("SELECT status, summary, error FROM summary_jobs WHERE handle = ?", (handle,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Summary job store read failed: {e}")
+            return None
+        if not row:
+            return None
+        return {"handle": handle, "status": row[0], "summary": json.loads(row[1]) if row[1] else None, "error": row[2]}
+
+    def submit(self, compute: Callable[[], Any], on_done: Optional[Callable[[str, Any], None]] = None) -> str:
+        """Run compute() in the background and return the handle for its result.
+
+        on_done(handle, summary) is called on the worker once compute() succeeds.
+        """
+        self._prune()
+        handle = uuid.uuid4().hex
+        created_at = time.time()
+        job = {"status": "pending", "summary": None, "error": None,
+               "finished_at": None, "created_at": created_at, "done": threading.Event()}
+        with self._lock:
+            self._jobs[handle] = job
+        self._store(handle, job, created_at)
+        self._executor.submit(self._run, handle, compute, on_done)
+        return handle
+
+    def _run(self, handle: str, compute: Callable[[], Any], on_done: Optional[Callable[[str, Any], None]]):
+        try:
+            summary = compute()
+            status, error = "completed", None
+        except Exception as e:
+            print(f"❌ Summary {handle} failed: {e}")
+            summary, status, error = None, "failed", str(e)
+
+        with self._lock:
+            job = self._jobs.get(handle)
+            if job:
+                job.update({"status": status, "summary": summary, "error": error, "finished_at": time.time()})
+            if status == "completed":
+                self.completed += 1
+            else:
+                self.failed += 1
+        if job:
+            self._store(handle, job, job["created_at"])
+
+        if on_done and status == "completed":
+            try:
+                on_done(handle, summary)
+            except Exception as e:
+                print(f"⚠️ Summary {handle} callback failed: {e}")
+        if job:
+            job["done"].set()
+
+    def get(self, handle: str, wait: float = 0) -> Optional[Dict]:
+        """Return the job's status and summary, waiting up to wait seconds for it to finish"""
+        with self._lock:
+            job = self._jobs.get(handle)
+        if job:
+            if wait > 0:
+                job["done"].wait(wait)
+            return {"handle": handle, "status": job["status"], "summary": job["summary"], "error": job["error"]}
+
+        # Submitted by another worker process; poll the shared store
+        deadline = time.monotonic() + wait
+        while True:
+            shared = self._load(handle)
+            if not shared or shared["status"] != "pending" or time.monotonic() >= deadline:
+                return shared
+            time.sleep(min(self.POLL_SECONDS, max(0, deadline - time.monotonic())))
+
+    def _prune(self):
+        """Forget finished jobs older than ttl, and jobs a dead worker left pending"""
+        now = time.time()
+        cutoff = now - self.ttl
+        with self._lock:
+            for handle in [h for h, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+                del self._jobs[handle]
+        try:
+            with self._connect() as db:
+                db.execute("DELETE FROM summary_jobs WHERE finished_at < ? OR (finished_at IS NULL AND created_at < ?)",
+                           (cutoff, cutoff - self.ttl))
+        except sqlite3.Error as e:
+            print(f"⚠️ Summary job store prune failed: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'ttl': self.ttl,
+                'db_path': self.db_path,
+                'pending': sum(1 for job in self._jobs.values() if job["status"] == "pending"),
+                'tracked': len(self._jobs),
+                'completed': self.completed,
+                'failed': self.failed
+            }
+
+# Global instance
+summary_jobs = SummaryJobs()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Server modules import each other by bare name, as when run from server/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,165 @@
+import pytest
+import context_cache as context_cache_module
+from context_cache import ContextCache
+from llm_client import llm_client, LLMError
+
+PREFIX = [{"role": "user", "parts": [{"text": "You are a tool router."}]}]
+CONTENTS = [{"role": "user", "parts": [{"text": "List my files"}]}]
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(context_cache_module.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Contents of every Gemini request, answered with a fixed reply"""
+    sent = []
+
+    def generate(contents, generation_config, model=None, **extra):
+        sent.append(contents)
+        return "reply"
+
+    def stream(contents, generation_config, model=None, on_response=None, **extra):
+        sent.append(contents)
+        yield "re"
+        yield "ply"
+
+    monkeypatch.setattr(llm_client, "gemini_generate", generate)
+    monkeypatch.setattr(llm_client, "gemini_stream", stream)
+    return sent
+
+@pytest.fixture
+def cache(clock):
+    cache = ContextCache(backend="local", ttl=100, min_tokens=1, max_entries=2, failure_backoff=30)
+    cache.deleted = []
+    delete = cache.backend.delete
+
+    def record_delete(name):
+        cache.deleted.append(name)
+        delete(name)
+
+    cache.backend.delete = record_delete
+    return cache
+
+def prefix(text: str):
+    return [{"role": "user", "parts": [{"text": text}]}]
+
+def test_first_lookup_creates_entry(cache):
+    name = cache.lookup(PREFIX)
+
+    assert name.startswith("cachedContents/local-")
+    assert cache.backend.prefixes[name] == PREFIX
+    assert cache.get_stats()["created"] == 1
+
+def test_small_prefix_is_sent_inline(clock):
+    cache = ContextCache(backend="local", min_tokens=10_000)
+
+    assert cache.lookup(PREFIX) is None
+    assert cache.backend.prefixes == {}
+
+def test_repeat_lookup_is_a_hit(cache):
+    name = cache.lookup(PREFIX)
+
+    assert cache.lookup(PREFIX) == name
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["created"] == 1
+
+def test_refreshes_only_below_half_the_ttl(cache, clock):
+    name = cache.lookup(PREFIX)
+
+    clock.now += 40
+    assert cache.lookup(PREFIX) == name
+    assert cache.get_stats()["refreshed"] == 0
+
+    clock.now += 20
+    assert cache.lookup(PREFIX) == name
+    assert cache.get_stats()["refreshed"] == 1
+    # The refreshed entry outlives its original expiry
+    clock.now += 90
+    assert cache.lookup(PREFIX) == name
+    assert cache.get_stats()["created"] == 1
+
+def test_expired_entry_is_recreated(cache, clock):
+    name = cache.lookup(PREFIX)
+
+    clock.now += 101
+    assert cache.lookup(PREFIX) not in (None, name)
+    assert cache.get_stats()["created"] == 2
+
+def test_failed_create_backs_off(cache, clock, monkeypatch):
+    attempts = []
+
+    def fail(contents, ttl, model=None):
+        attempts.append(contents)
+        raise LLMError("Gemini API error: quota exceeded", 429)
+
+    monkeypatch.setattr(cache.backend, "create", fail)
+    assert cache.lookup(PREFIX) is None
+    clock.now += 29
+    assert cache.lookup(PREFIX) is None
+    assert len(attempts) == 1
+
+    clock.now += 2
+    assert cache.lookup(PREFIX) is None
+    assert len(attempts) == 2
+
+def test_lru_eviction_deletes_cache(cache):
+    first = cache.lookup(prefix("first"))
+    second = cache.lookup(prefix("second"))
+    cache.lookup(prefix("first"))  # now the most recently used
+
+    cache.lookup(prefix("third"))
+
+    assert cache.deleted == [second]
+    assert second not in cache.backend.prefixes
+    assert first in cache.backend.prefixes
+    assert cache.get_stats()["entries"] == 2
+
+def test_generate_uses_cached_prefix(cache, sent):
+    name = cache.lookup(PREFIX)
+
+    assert cache.generate(PREFIX, CONTENTS, {}) == "reply"
+    assert sent == [PREFIX + CONTENTS]
+    assert cache.lookup(PREFIX) == name
+    assert cache.get_stats()["fallbacks"] == 0
+
+def test_missing_cache_is_dropped_and_sent_inline(cache, sent):
+    name = cache.lookup(PREFIX)
+    cache.backend.prefixes.clear()
+
+    assert cache.generate(PREFIX, CONTENTS, {}) == "reply"
+    assert sent == [PREFIX + CONTENTS]
+    assert cache.deleted == [name]
+    assert cache.get_stats()["fallbacks"] == 1
+    # The next request creates a fresh cache
+    assert cache.lookup(PREFIX) not in (None, name)
+
+def test_transient_error_keeps_entry(cache, sent, monkeypatch):
+    name = cache.lookup(PREFIX)
+
+    def overloaded(name, contents, generation_config, model=None):
+        raise LLMError("Gemini API error: The model is overloaded", 503)
+
+    monkeypatch.setattr(cache.backend, "generate", overloaded)
+    assert cache.generate(PREFIX, CONTENTS, {}) == "reply"
+    assert sent == [PREFIX + CONTENTS]
+    assert cache.deleted == []
+    assert cache.lookup(PREFIX) == name
+
+def test_stream_falls_back_before_first_chunk(cache, sent):
+    name = cache.lookup(PREFIX)
+    cache.backend.prefixes.clear()
+
+    assert "".join(cache.stream(PREFIX, CONTENTS, {})) == "reply"
+    assert sent == [PREFIX + CONTENTS]
+    assert cache.deleted == [name]
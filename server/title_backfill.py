@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Callable, Dict, List, Optional
+
+class BackfillRunningError(Exception):
+    """Raised when a backfill is started while another one is still running"""
+
+    def __init__(self, job: Dict):
+        super().__init__(f"Title backfill {job['id']} is already running")
+        self.job = job
+
+class BackfillUnavailableError(Exception):
+    """Raised when the shared job store could not be opened, so backfills are disabled"""
+
+class TitleBackfill:
+    """Bulk titling of existing conversations as tracked background jobs.
+
+    Queries are packed batch_size to an LLM request; requests run on a bounded pool
+    and start no faster than requests_per_minute across all jobs. Job progress lives
+    in a SQLite file shared by every worker process, which is also where the single
+    running job is claimed, so any worker can report on it or refuse a second one.
+    """
+
+    JOB_RETENTION = 86400
+
+    def __init__(self, workers: int = None, batch_size: int = None, requests_per_minute: float = None,
+                 db_path: str = None, stale_after: float = None):
+        self.workers = workers or int(os.getenv("TITLE_BACKFILL_WORKERS", 3))
+        self.batch_size = batch_size or int(os.getenv("TITLE_BACKFILL_BATCH_SIZE", 10))
+        self.requests_per_minute = requests_per_minute or float(os.getenv("TITLE_BACKFILL_RPM", 30))
+        self.db_path = db_path or os.getenv("TITLE_BACKFILL_PATH") or os.path.join(tempfile.gettempdir(), "tensora_title_backfill.db")
+        # A running job with no progress for this long belonged to a worker that died
+        self.stale_after = stale_after or float(os.getenv("TITLE_BACKFILL_STALE_SECONDS", 300))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="title-backfill")
+        self._next_start = 0.0  # earliest time the next LLM request may start
+        self._lock = threading.Lock()
+
+        try:
+            with closing(self._connect()) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS title_backfill_jobs (id TEXT PRIMARY KEY, status TEXT, "
+                           "job TEXT, updated_at REAL)")
+            self.available = True
+        except sqlite3.Error as e:
+            print(f"⚠️ Title backfill job store unavailable, backfills are disabled: {e}")
+            self.available = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit, so claiming a job can take the write lock explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    def _running(self, db: sqlite3.Connection) -> Optional[Dict]:
+        row = db.execute("SELECT job FROM title_backfill_jobs WHERE status = 'running' AND updated_at >= ?",
+                         (time.time() - self.stale_after,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, db: sqlite3.Connection, job: Dict):
+        db.execute("INSERT OR REPLACE INTO title_backfill_jobs (id, status, job, updated_at) VALUES (?, ?, ?, ?)",
+                   (job["id"], job["status"], json.dumps(job), time.time()))
+
+    def active_job(self) -> Optional[Dict]:
+        """Return the running job, if any"""
+        if not self.available:
+            return None
+        db = self._connect()
+        try:
+            return self._running(db)
+        finally:
+            db.close()
+
+    def start(self, conversations: List[Dict], generate_batch: Callable[[List[str]], List[str]],
+              on_title: Callable[[str, str], None]) -> Dict:
+        """Start titling conversations ({"id", "query"} dicts) and return the job's progress.
+
+        generate_batch(queries) returns one title per query; on_title(conversation_id, title)
+        stores each title as it arrives. Raises BackfillRunningError if a job is already
+        running on any worker; the check and the registration are one transaction.
+        Raises BackfillUnavailableError if the job store could not be opened.
+        """
+        if not self.available:
+            raise BackfillUnavailableError(f"Title backfill job store {self.db_path} is unavailable")
+        batches = [conversations[i:i + self.batch_size] for i in range(0, len(conversations), self.batch_size)]
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "running" if batches else "completed",
+            "total": len(conversations),
+            "titled": 0,
+            "failed": 0,
+            "batches": len(batches),
+            "batches_done": 0,
+            "started_at": time.time(),
+            "finished_at": None if batches else time.time(),
+            "titles": {}
+        }
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                running = self._running(db)
+                if running:
+                    raise BackfillRunningError(running)
+                # Finished and abandoned jobs are kept for a day so their progress can still be read
+                db.execute("DELETE FROM title_backfill_jobs WHERE updated_at < ?", (time.time() - self.JOB_RETENTION,))
+                self._save(db, job)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        finally:
+            db.close()
+
+        for batch in batches:
+            self._executor.submit(self._run_batch, job["id"], batch, generate_batch, on_title)
+        return job
+
+    def _wait_for_slot(self):
+        """Block until this request may start under the rate limit"""
+        interval = 60.0 / self.requests_per_minute
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_start)
+            self._next_start = start + interval
+        if start > now:
+            time.sleep(start - now)
+
+    def _run_batch(self, job_id: str, batch: List[Dict], generate_batch: Callable[[List[str]], List[str]],
+                   on_title: Callable[[str, str], None]):
+        titled = {}
+        try:
+            self._wait_for_slot()
+            titles = generate_batch([conversation["query"] for conversation in batch])
+            for conversation, title in zip(batch, titles):
+                try:
+                    on_title(conversation["id"], title)
+                    titled[conversation["id"]] = title
+                except Exception as e:
+                    print(f"Failed to store title for conversation {conversation['id']}: {e}")
+        except Exception as e:
+            print(f"Title backfill batch failed: {e}")
+
+        db = self._connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT job FROM title_backfill_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row:
+                job = json.loads(row[0])
+                job["titles"].update(titled)
+                job["titled"] += len(titled)
+                job["failed"] += len(batch) - len(titled)
+                job["batches_done"] += 1
+                if job["batches_done"] == job["batches"]:
+                    job["status"] = "completed"
+                    job["finished_at"] = time.time()
+                self._save(db, job)
+            db.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"Failed to record title backfill progress: {e}")
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        if not self.available:
+            return None
+        db = self._connect()
+        try:
+            row = db.execute("SELECT job FROM title_backfill_jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            db.close()
+        return json.loads(row[0]) if row else None
+
+    def get_stats(self) -> Dict:
+        jobs, running = 0, None
+        if self.available:
+            db = self._connect()
+            try:
+                jobs = db.execute("SELECT COUNT(*) FROM title_backfill_jobs").fetchone()[0]
+                running = self._running(db)
+            finally:
+                db.close()
+        return {
+            'available': self.available,
+            'workers': self.workers,
+            'batch_size': self.batch_size,
+            'requests_per_minute': self.requests_per_minute,
+            'db_path': self.db_path,
+            'jobs': jobs,
+            'running': 1 if running else 0
+        }
+
+# Global instance
+title_backfill = TitleBackfill()
@@ -1,40 +1,19 @@
-import os
-import json
-import requests
-from typing import Optional
+import re
+from typing import List, Optional
+from llm_client import llm_client
+
+# "3. Some Title" or "3) Some Title" lines in a batch title reply
+NUMBERED_LINE = re.compile(r"^\s*(\d+)[.)]\s*(.+)$")
 
 class TitleGenerator:
     """Generates concise chat titles using AI providers"""
     
     def __init__(self):
-        self.api_keys = {
-            "gemini": os.getenv("GEMINI_API_KEY"),
-            "openai": os.getenv("OPENAI_API_KEY"),
-            "claude": os.getenv("CLAUDE_API_KEY"),
-            "groq": os.getenv("GROQ_API_KEY")
-        }
-        
-        self.models = {
-            "openai": "gpt-3.5-turbo",
-            "gemini": "gemini-2.5-flash",
-            "claude": "claude-3-haiku-20240307",
-            "groq": "llama3-8b-8192"
-        }
+        self.llm = llm_client
+        self.api_keys = llm_client.api_keys
+        self.models = llm_client.models
     
-    def generate_title(self, query: str, provider: str = "gemini", model: str = None) -> Optional[str]:
-        """Generate a concise title (max 5 words) for a chat query"""
-        
-        if not self.api_keys.get(provider):
-            # Fallback to gemini if provider key not available
-            if provider != "gemini" and self.api_keys.get("gemini"):
-                provider = "gemini"
-            else:
-                return self._generate_fallback_title(query)
-        
-        if not model:
-            model = self.models.get(provider, "gemini-2.5-flash")
-        
-        system_prompt = """You are a title generator. Create a concise, descriptive title for the given user query.
+    SYSTEM_PROMPT = """You are a title generator. Create a concise, descriptive title for the given user query.
 
 RULES:
 - Maximum 5 words
@@ -55,139 +34,84 @@ Title: "Email Meeting Notification"
 
 Query: "Create a LinkedIn post about AI trends"
 Title: "LinkedIn AI Trends Post"
+"""
 
-Generate a title for the following query:"""
+    # Queries packed into a batch prompt are cut to this many characters
+    MAX_BATCH_QUERY_CHARS = 500
+    
+    def _resolve_provider(self, provider: str) -> Optional[str]:
+        """Return provider, or gemini if provider has no key, or None if neither has a key"""
+        if self.api_keys.get(provider):
+            return provider
+        # Fallback to gemini if provider key not available
+        if provider != "gemini" and self.api_keys.get("gemini"):
+            return "gemini"
+        return None
+    
+    def generate_title(self, query: str, provider: str = "gemini", model: str = None) -> Optional[str]:
+        """Generate a concise title (max 5 words) for a chat query"""
+        
+        provider = self._resolve_provider(provider)
+        if not provider:
+            return self._generate_fallback_title(query)
+        
+        model = self.llm.model_for(provider, model)
         
         try:
-            if provider == "gemini":
-                return self._generate_gemini_title(system_prompt, query)
-            elif provider == "openai":
-                return self._generate_openai_title(system_prompt, query)
-            elif provider == "claude":
-                return self._generate_claude_title(system_prompt, query)
-            elif provider == "groq":
-                return self._generate_groq_title(system_prompt, query)
-            else:
-                return self._generate_fallback_title(query)
+            title = self.llm.chat(
+                provider,
+                self.SYSTEM_PROMPT + "\nGenerate a title for the following query:",
+                f"Query: {query}\n\nTitle:",
+                model=model,
+                temperature=0.3,
+                max_tokens=20,
+                timeout=10,
+                # Thinking tokens would use up the 20-token budget before any title text
+                thinking_budget=0
+            )
+            return self._clean_title(title)
                 
         except Exception as e:
             print(f"Title generation error: {e}")
             return self._generate_fallback_title(query)
     
-    def _generate_gemini_title(self, system_prompt: str, query: str) -> str:
-        """Generate title using Gemini API"""
-        endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent?key={self.api_keys['gemini']}"
-        
-        headers = {"Content-Type": "application/json"}
-        body = {
-            "contents": [{
-                "parts": [{
-                    "text": f"{system_prompt}\n\nQuery: {query}\n\nTitle:"
-                }]
-            }],
-            "generationConfig": {
-                "temperature": 0.3,
-                "maxOutputTokens": 20
-            }
-        }
-        
+    def generate_titles(self, queries: List[str], provider: str = "gemini", model: str = None) -> List[str]:
+        """Generate titles for several queries in one request, in query order.
+
+        Queries missing from the reply, or every query if the request fails, get fallback titles.
+        """
+        if len(queries) == 1:
+            return [self.generate_title(queries[0], provider, model)]
+        
+        provider = self._resolve_provider(provider)
+        if not provider or not queries:
+            return [self._generate_fallback_title(query) for query in queries]
+        
+        numbered = "\n".join(
+            f"{index}. Query: {' '.join(query.split())[:self.MAX_BATCH_QUERY_CHARS]}"
+            for index, query in enumerate(queries, 1)
+        )
+        titles = {}
         try:
-            response = requests.post(endpoint, headers=headers, json=body, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Handle different response structures
-            if "candidates" in data and len(data["candidates"]) > 0:
-                candidate = data["candidates"][0]
-                if "content" in candidate and "parts" in candidate["content"]:
-                    if len(candidate["content"]["parts"]) > 0:
-                        title = candidate["content"]["parts"][0]["text"].strip()
-                        return self._clean_title(title)
-            
-            # Fallback if structure is unexpected
-            print(f"Unexpected Gemini response structure: {data}")
-            return self._clean_title(query[:30])
-            
+            reply = self.llm.chat(
+                provider,
+                self.SYSTEM_PROMPT + "\nGenerate a title for each of the following numbered queries. "
+                "Reply with one line per query in the form \"<number>. <title>\", in the same order:",
+                numbered,
+                model=self.llm.model_for(provider, model),
+                temperature=0.3,
+                max_tokens=20 * len(queries),
+                timeout=30,
+                thinking_budget=0
+            )
+            for line in reply.splitlines():
+                match = NUMBERED_LINE.match(line)
+                if match and 1 <= int(match.group(1)) <= len(queries):
+                    titles[int(match.group(1)) - 1] = self._clean_title(match.group(2))
         except Exception as e:
-            print(f"Gemini title generation error: {e}")
-            return self._clean_title(query[:30])
-    
-    def _generate_openai_title(self, system_prompt: str, query: str) -> str:
-        """Generate title using OpenAI API"""
-        endpoint = "https://api.openai.com/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_keys['openai']}"
-        }
-        body = {
-            "model": self.models["openai"],
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Query: {query}\n\nTitle:"}
-            ],
-            "temperature": 0.3,
-            "max_tokens": 20
-        }
-        
-        response = requests.post(endpoint, headers=headers, json=body, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        title = data["choices"][0]["message"]["content"].strip()
-        return self._clean_title(title)
-    
-    def _generate_claude_title(self, system_prompt: str, query: str) -> str:
-        """Generate title using Claude API"""
-        endpoint = "https://api.anthropic.com/v1/messages"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": self.api_keys["claude"],
-            "anthropic-version": "2023-06-01"
-        }
-        body = {
-            "model": self.models["claude"],
-            "max_tokens": 20,
-            "temperature": 0.3,
-            "system": system_prompt,
-            "messages": [
-                {"role": "user", "content": f"Query: {query}\n\nTitle:"}
-            ]
-        }
-        
-        response = requests.post(endpoint, headers=headers, json=body, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        title = data["content"][0]["text"].strip()
-        return self._clean_title(title)
-    
-    def _generate_groq_title(self, system_prompt: str, query: str) -> str:
-        """Generate title using Groq API"""
-        endpoint = "https://api.groq.com/openai/v1/chat/completions"
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_keys['groq']}"
-        }
-        body = {
-            "model": self.models["groq"],
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Query: {query}\n\nTitle:"}
-            ],
-            "temperature": 0.3,
-            "max_tokens": 20
-        }
-        
-        response = requests.post(endpoint, headers=headers, json=body, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        title = data["choices"][0]["message"]["content"].strip()
-        return self._clean_title(title)
+            print(f"Batch title generation error: {e}")
+        
+        return [titles.get(index) or self._generate_fallback_title(query) for index, query in enumerate(queries)]
     
     def _clean_title(self, title: str) -> str:
         """Clean and validate the generated title"""
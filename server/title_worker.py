@@ -0,0 +1,69 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+class TitleWorker:
+    """Generates conversation titles on a small background pool, off the reply path.
+
+    A conversation is queued at most once at a time, and conversations titled recently
+    by this process are not queued again.
+    """
+
+    def __init__(self, workers: int = None, remember: int = 1000):
+        self.workers = workers or int(os.getenv("TITLE_WORKERS", 2))
+        self.remember = remember
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="title")
+        self._queued = set()  # conversation ids queued or running
+        self._titled = OrderedDict()  # conversation ids titled recently, oldest first
+        self._lock = threading.Lock()
+
+        self.generated = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    def enqueue(self, conversation_id: str, generate: Callable[[], str], on_title: Callable[[str], None]) -> bool:
+        """Queue generate() for a conversation; on_title(title) runs on the worker with the result.
+
+        Returns False if the conversation is already queued or was titled recently.
+        """
+        with self._lock:
+            if conversation_id in self._queued or conversation_id in self._titled:
+                self.deduplicated += 1
+                return False
+            self._queued.add(conversation_id)
+        self._executor.submit(self._run, conversation_id, generate, on_title)
+        return True
+
+    def _run(self, conversation_id: str, generate: Callable[[], str], on_title: Callable[[str], None]):
+        try:
+            title = generate()
+            on_title(title)
+            titled = True
+        except Exception as e:
+            print(f"Failed to generate title for conversation {conversation_id}: {e}")
+            titled = False
+
+        with self._lock:
+            self._queued.discard(conversation_id)
+            if titled:
+                self.generated += 1
+                self._titled[conversation_id] = True
+                while len(self._titled) > self.remember:
+                    self._titled.popitem(last=False)
+            else:
+                self.failed += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queued': len(self._queued),
+                'generated': self.generated,
+                'deduplicated': self.deduplicated,
+                'failed': self.failed
+            }
+
+# Global instance
+title_worker = TitleWorker()
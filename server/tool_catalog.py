@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+class ToolDiscoveryError(Exception):
+    """Raised when discovery across every MCP server produced no tools at all"""
+
+    def __init__(self, errors: Dict[str, str]):
+        detail = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__("No tools discovered on any MCP server" + (f" ({detail})" if detail else ""))
+        self.errors = errors
+
+class ToolCatalog:
+    """Discovers tools from every configured MCP server in parallel and merges them under server-namespaced names"""
+
+    # Tool names may only use [A-Za-z0-9_-], so the separator must too
+    SEPARATOR = "__"
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or int(os.getenv("MCP_DISCOVERY_WORKERS", 8))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="discovery")
+
+    def namespaced_name(self, server_name: str, tool_name: str) -> str:
+        return f"{server_name}{self.SEPARATOR}{tool_name}"
+
+    def split_name(self, namespaced: str, server_names) -> Optional[Tuple[str, str]]:
+        """Split a namespaced tool name into (server name, tool name) if it names a known server"""
+        if not namespaced or self.SEPARATOR not in namespaced:
+            return None
+        server_name, tool_name = namespaced.split(self.SEPARATOR, 1)
+        if server_name in server_names and tool_name:
+            return server_name, tool_name
+        return None
+
+    def discover(self, servers: Dict[str, str], list_tools: Callable[[str], List[Dict]]) -> Tuple[List[Dict], Dict[str, str]]:
+        """List tools from every server concurrently and return (merged catalog, errors).
+
+        servers maps server name -> url. Servers that fail are left out of the catalog and
+        reported in errors by name, so discovery takes as long as the slowest server rather
+        than the sum of all of them. Raises ToolDiscoveryError if the catalog is empty.
+        """
+        futures = {
+            name: self._executor.submit(list_tools, url)
+            for name, url in servers.items()
+        }
+
+        catalog = []
+        errors = {}
+        for name, future in futures.items():
+            try:
+                tools = future.result()
+            except Exception as e:
+                print(f"⚠️ Tool discovery failed for {name}: {e}")
+                errors[name] = str(e)
+                continue
+
+            for tool in tools:
+                catalog.append({
+                    **tool,
+                    "name": self.namespaced_name(name, tool.get("name")),
+                    "description": f"[{name}] {tool.get('description') or ''}".strip()
+                })
+            print(f"🔧 Discovered {len(tools)} tools on {name}")
+
+        if not catalog:
+            raise ToolDiscoveryError(errors)
+        return catalog, errors
+
+# Global instance
+tool_catalog = ToolCatalog()
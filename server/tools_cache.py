@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+class ToolsCache:
+    """Per-server cache of MCP tools/list results with TTL and stale-while-revalidate refresh"""
+
+    def __init__(self, ttl: float = None, stale_ttl: float = None):
+        # Entries younger than ttl are served as-is; entries up to ttl + stale_ttl old
+        # are served while a background refresh replaces them
+        self.ttl = ttl if ttl is not None else float(os.getenv("MCP_TOOLS_CACHE_TTL", 300))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv("MCP_TOOLS_CACHE_STALE_TTL", 3600))
+
+        self._entries = {}  # server url -> {"tools": list, "fetched_at": float}
+        self._generations = {}  # server url -> invalidation counter
+        self._epoch = 0  # bumped when the whole cache is purged
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, url: str, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return the tools for a server URL, calling fetch() to load them when needed"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(url)
+            generation = self._generation(url)
+            if entry:
+                age = now - entry["fetched_at"]
+                if age <= self.ttl:
+                    self.hits += 1
+                    return entry["tools"]
+                if age <= self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._start_refresh(url, fetch, generation)
+                    return entry["tools"]
+            self.misses += 1
+
+        tools = fetch()
+        self._store(url, tools, generation)
+        return tools
+
+    def peek(self, url: str) -> Optional[List[Dict]]:
+        """Return the cached tools for a server URL, however old, without fetching"""
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry["tools"] if entry else None
+
+    def _generation(self, url: str):
+        """Return the invalidation marker for a server URL (caller holds the lock)"""
+        return (self._epoch, self._generations.get(url, 0))
+
+    def _start_refresh(self, url: str, fetch: Callable[[], List[Dict]], generation: tuple):
+        """Refresh an entry on a background thread (caller holds the lock)"""
+        if url in self._refreshing:
+            return
+        self._refreshing.add(url)
+
+        def refresh():
+            try:
+                self._store(url, fetch(), generation)
+                print(f"🔄 Refreshed cached tools for {url}")
+            except Exception as e:
+                print(f"⚠️ Background tools refresh failed for {url}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _store(self, url: str, tools: List[Dict], generation: tuple):
+        """Store fetched tools unless the entry was invalidated while fetching.
+
+        fetch() raises on errors, so an empty list is a real answer and is cached like any other.
+        """
+        with self._lock:
+            if self._generation(url) != generation:
+                return
+            self._entries[url] = {"tools": tools, "fetched_at": time.monotonic()}
+
+    def invalidate(self, url: str) -> bool:
+        """Drop the cached tools for a server URL"""
+        with self._lock:
+            self._generations[url] = self._generations.get(url, 0) + 1
+            return self._entries.pop(url, None) is not None
+
+    def purge(self, url: Optional[str] = None) -> int:
+        """Drop cached tools for one server URL, or for every server when url is None"""
+        if url:
+            return 1 if self.invalidate(url) else 0
+        with self._lock:
+            count = len(self._entries)
+            self._epoch += 1
+            self._entries.clear()
+            return count
+
+    def get_stats(self) -> Dict:
+        """Get statistics about the tools cache"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'entries': [
+                    {'url': url, 'tool_count': len(entry["tools"]), 'age_seconds': round(now - entry["fetched_at"], 1)}
+                    for url, entry in self._entries.items()
+                ]
+            }
+
+# Global instance
+tools_cache = ToolsCache()
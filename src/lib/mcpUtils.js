@@ -78,6 +78,84 @@ export async function executePlan(actions, options = {}) {
   }, { timeout });
 }
 
+/**
+ * Execute AI-generated plan, streaming per-action progress via Server-Sent Events
+ */
+export async function streamExecutePlan(actions, options = {}) {
+  const {
+    mcpUrl,
+    serverName = 'Default',
+    onActionStart,
+    onActionResult,
+    onActionError,
+    onComplete,
+    onError
+  } = options;
+
+  const response = await fetch(`${API_BASE_URL}/proxy/ai/execute/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({
+      actions,
+      mcpUrl,
+      serverName
+    })
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop() || '';
+
+      for (const line of lines) {
+        if (line.startsWith('data: ')) {
+          try {
+            const eventData = JSON.parse(line.slice(6));
+            const hasIndex = eventData.index !== undefined;
+
+            switch (eventData.type) {
+              case 'status':
+                if (hasIndex) onActionStart?.(eventData.index, eventData.action);
+                break;
+              case 'chunk':
+                onActionResult?.(eventData.index, eventData.data);
+                break;
+              case 'error':
+                if (hasIndex) {
+                  onActionError?.(eventData.index, eventData.data);
+                } else {
+                  onError?.(eventData.details || eventData.error || 'Streaming error occurred');
+                }
+                break;
+              case 'complete':
+                onComplete?.(eventData.data);
+                break;
+            }
+          } catch (parseError) {
+            console.warn('Failed to parse SSE data:', parseError);
+          }
+        }
+      }
+    }
+  } finally {
+    reader.releaseLock();
+  }
+}
+
 /**
  * Stream AI response using Server-Sent Events
  */
@@ -86,23 +164,24 @@ export async function streamAnalyzePrompt(prompt, options = {}) {
     provider = 'gemini',
     mcpUrl,
     serverName = 'Default',
+    conversationId,
     onChunk,
     onComplete,
     onError,
     onStatus
   } = options;
   
-  const response = await fetch(`${API_BASE_URL}/proxy/stream`, {
+  const response = await fetch(`${API_BASE_URL}/proxy/ai/stream`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
     body: JSON.stringify({
-      action: 'ai_analyze',
       provider,
       prompt,
-      url: mcpUrl,
-      serverName
+      mcpUrl,
+      serverName,
+      conversation_id: conversationId
     })
   });
   
@@ -136,7 +215,7 @@ export async function streamAnalyzePrompt(prompt, options = {}) {
                 onComplete?.(eventData.data);
                 break;
               case 'error':
-                onError?.(eventData.error || 'Streaming error occurred');
+                onError?.(eventData.details || eventData.error || 'Streaming error occurred');
                 break;
               case 'status':
                 onStatus?.(eventData.message);